@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.events import bus
+from app.core.metrics import register_gauge
+
+MISSING = object()
+
+_caches: Dict[str, "LocalCache"] = {}
+
+
+class LocalCache:
+    """
+    Per-process TTL + LRU cache. `invalidate` reaches the copies held by the other workers
+    through the event bus; the TTL bounds staleness if a message is ever lost.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = 10000):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+        register_gauge(f"geolockbox_cache_{name}_entries", f"Entries in the {name} cache.", lambda: len(self._data))
+        register_gauge(f"geolockbox_cache_{name}_hits", f"Hits of the {name} cache.", lambda: self.hits)
+        register_gauge(f"geolockbox_cache_{name}_misses", f"Misses of the {name} cache.", lambda: self.misses)
+
+    def get(self, key: Hashable) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < now:
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def drop_local(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """
+        Drops `key` (or everything) here and in every other worker.
+        """
+        bus.publish("cache.invalidate", {"cache": self.name, "key": key})
+
+
+def _on_invalidate(payload):
+    cache = _caches.get(payload["cache"])
+    if cache is not None:
+        cache.drop_local(payload["key"])
+
+
+bus.subscribe("cache.invalidate", _on_invalidate)
@@ -1,21 +1,90 @@
 import logging
 import os
 import time
+from typing import Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-# Set timezone to America/Sao_Paulo to avoid timezone issues
-os.environ["TZ"] = "America/Sao_Paulo"
-time.tzset()
-
 class EnvSettings(BaseSettings):
     DEBUG: bool = False
+    TIMEZONE: str = "America/Sao_Paulo"  # timestamps are stored as naive local time in this zone
+    DATABASE_URL: Optional[str] = None  # defaults to app/geolockbox.db
+    METRICS_ENABLED: bool = True
+
+    # Multi-worker deployment (python -m app.serve)
+    WORKERS: int = 1
+    EVENT_BUS_URL: str = "local://"  # unix:///dir for one host, redis://... for several
+    CPU_POOL_SIZE: int = 2  # processes for CPU-heavy work, 0 runs it in the threadpool
+
+    # Slow-request capture, can also be switched at runtime through PUT /admin/profiling
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0  # share of requests run under cProfile; slow ones are captured either way
+    PROFILING_THRESHOLD_MS: float = 500.0
+    PROFILING_BUFFER_SIZE: int = 50
+
+    # Application logs written to the Log table in batches by a background thread
+    LOG_DB_ENABLED: bool = True
+    LOG_DB_LEVEL: str = "INFO"
+    LOG_DB_BATCH_SIZE: int = 500
+    LOG_DB_FLUSH_SECONDS: float = 1.0
+    LOG_DB_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never block a request
+    LOG_DB_RATE_LIMIT_PER_MINUTE: int = 60  # per logger and message template, 0 = unlimited
+    LOG_DB_EXCLUDE: str = "sqlalchemy,uvicorn.access,httpx"  # comma separated logger prefixes
+
+    # Telemetry retention: raw points -> 1 min rollups -> 1 h rollups
+    TELEMETRY_RETENTION_ENABLED: bool = True
+    TELEMETRY_RAW_RETENTION_DAYS: int = 7
+    TELEMETRY_MINUTE_RETENTION_DAYS: int = 90
+    TELEMETRY_ROLLUP_INTERVAL_SECONDS: int = 300
+
+    # ETA of active deliveries, recomputed in the background
+    ETA_ENABLED: bool = True
+    ETA_INTERVAL_SECONDS: int = 30
+    ETA_ACTIVE_STATUSES: str = "in_progress,in_transit"
+    ETA_SPEED_WINDOW_MINUTES: int = 15  # telemetry used for a device's speed profile
+    ETA_DEFAULT_SPEED_KMH: float = 30.0  # when a device has no recent speed readings
+    ETA_MIN_SPEED_KMH: float = 5.0  # floor so a stopped box doesn't get an endless ETA
+    ETA_ROUTE_FACTOR: float = 1.3  # road distance / straight-line distance
+
+    # Geofence enter/exit/dwell events detected at telemetry ingest
+    GEOFENCE_EVENTS_ENABLED: bool = True
+    GEOFENCE_HYSTERESIS_METERS: float = 20.0  # leaving needs radius + this, so jitter on the edge can't flap
+    GEOFENCE_CONFIRM_SECONDS: float = 10.0  # a crossing must hold this long before it becomes an event
+    GEOFENCE_DWELL_SECONDS: float = 120.0
+
+    # GPS cleaning applied to telemetry at ingest
+    GPS_FILTER_ENABLED: bool = True
+    GPS_MAX_SPEED_KMH: float = 180.0
+    GPS_REORDER_WINDOW: int = 5
+    GPS_DEDUPE_WINDOW: int = 32
+    GPS_ACCURACY_METERS: float = 10.0
+    GPS_KALMAN_ENABLED: bool = False
+    GPS_KALMAN_Q_METERS_PER_SECOND: float = 3.0
+
+    # Binary telemetry frames (POST /telemetry/frames)
+    TELEMETRY_FRAME_MAX_BYTES: int = 1048576
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
 ENV = EnvSettings()
 
-logging.basicConfig(
-    level=logging.DEBUG if ENV.DEBUG else logging.INFO,
-    format="%(asctime)s [%(levelname)s %(name)s - %(funcName)s() ] %(message)s"
-)
\ No newline at end of file
+
+def apply_timezone():
+    """
+    Sets the process timezone to ENV.TIMEZONE. Called by the app factory instead of at import,
+    so importing the settings has no side effects on the process.
+    """
+    os.environ["TZ"] = ENV.TIMEZONE
+    if hasattr(time, "tzset"):  # not on Windows
+        time.tzset()
+
+
+def configure_logging():
+    """
+    Logs to stderr at INFO (DEBUG with ENV.DEBUG). Called by startup() rather than at import,
+    so importing the settings leaves the process' logging alone.
+    """
+    logging.basicConfig(
+        level=logging.DEBUG if ENV.DEBUG else logging.INFO,
+        format="%(asctime)s [%(levelname)s %(name)s - %(funcName)s() ] %(message)s"
+    )
@@ -0,0 +1,36 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import ENV
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if _pool is None and ENV.CPU_POOL_SIZE > 0:
+        # spawn: the workers must not inherit the web process' threads and sockets
+        _pool = ProcessPoolExecutor(max_workers=ENV.CPU_POOL_SIZE, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def run_cpu(fn, *args):
+    """
+    Runs a CPU-bound, picklable function outside the event loop: in the process pool,
+    or in the threadpool when CPU_POOL_SIZE is 0.
+    """
+    pool = get_pool()
+    if pool is None:
+        return await run_in_threadpool(fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -1,9 +1,11 @@
 from sqlmodel import create_engine, Session
 import os
 
+from app.core.config import ENV
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_FILE = os.path.join(BASE_DIR, "geolockbox.db")
-sqlite_url = f"sqlite:///{os.path.join(BASE_DIR, DB_FILE)}"
+sqlite_url = ENV.DATABASE_URL or f"sqlite:///{os.path.join(BASE_DIR, DB_FILE)}"
 
 engine = create_engine(sqlite_url, echo=False, connect_args={"check_same_thread": False})
 
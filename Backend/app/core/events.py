@@ -0,0 +1,237 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.core.config import ENV
+from app.core.metrics import register_gauge
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class EventBus:
+    """
+    In-process publish/subscribe. Subclasses also fan messages out to the other workers;
+    handlers of the publishing process are always called directly, never through the transport.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel].append(handler)
+
+    def publish(self, channel: str, payload: Dict[str, Any]):
+        self._dispatch(channel, payload)
+        self._send({"origin": self.origin, "channel": channel, "payload": payload})
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def _send(self, message: Dict[str, Any]):
+        pass
+
+    def _receive(self, raw: bytes):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            logger.warning("Dropping malformed event bus message")
+            return
+        if message.get("origin") == self.origin:
+            return
+        self._dispatch(message["channel"], message["payload"])
+
+    def _dispatch(self, channel: str, payload: Dict[str, Any]):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("Event handler for %s failed", channel)
+
+
+class UnixSocketBus(EventBus):
+    """
+    Broker-less bus for workers on one host: every process binds a datagram socket in
+    `directory` and publishing sends one datagram to each peer socket found there.
+    Sends never block the publishing request: a peer whose receive queue is full misses the message.
+    """
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{self.origin[:8]}.sock")
+        self._sock = None
+        self._out = None
+        self._thread = None
+        self.dropped = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        # separate socket for sending, the listener thread blocks on the bound one
+        self._out = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._out.setblocking(False)
+        self._thread = threading.Thread(target=self._listen, name="event-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._sock is None:
+            return
+        sock, self._sock = self._sock, None
+        sock.close()
+        self._out.close()
+        self._out = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _listen(self):
+        while self._sock is not None:
+            try:
+                raw = self._sock.recv(65536)
+            except OSError:
+                return
+            self._receive(raw)
+
+    def _send(self, message: Dict[str, Any]):
+        out = self._out
+        if out is None:
+            return
+        data = json.dumps(message, default=str).encode()
+        for peer in glob.glob(os.path.join(self.directory, "*.sock")):
+            if peer == self.path:
+                continue
+            try:
+                out.sendto(data, peer)
+            except BlockingIOError:
+                # the peer is not reading fast enough, better it loses a message than we wait
+                self.dropped += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # the worker behind this socket is gone
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except OSError as exc:
+                logger.warning("Event bus send to %s failed: %s", peer, exc)
+
+
+class RedisBus(EventBus):
+    """
+    Broker-backed bus for workers on several hosts. Needs the optional `redis` package.
+    """
+
+    CHANNEL = "geolockbox.events"
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self._client = None
+        self._pubsub = None
+        self._thread = None
+
+    def start(self):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("EVENT_BUS_URL uses redis:// but the redis package is not installed") from exc
+        self._client = redis.Redis.from_url(self.url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.CHANNEL: lambda message: self._receive(message["data"])})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._pubsub.close()
+            self._thread = None
+
+    def _send(self, message: Dict[str, Any]):
+        if self._client is None:
+            return
+        try:
+            self._client.publish(self.CHANNEL, json.dumps(message, default=str))
+        except Exception as exc:
+            logger.warning("Event bus publish failed: %s", exc)
+
+
+def create_bus(url: str) -> EventBus:
+    """
+    local://            single process, no fan-out
+    unix:///some/dir    workers on this host
+    redis://host:6379/0 workers on several hosts
+    """
+    if url.startswith("unix://"):
+        return UnixSocketBus(url[len("unix://"):])
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBus(url)
+    if url.startswith("local://"):
+        return EventBus()
+    raise ValueError(f"Unsupported EVENT_BUS_URL {url}")
+
+
+bus = create_bus(ENV.EVENT_BUS_URL)
+register_gauge("geolockbox_event_bus_dropped_total", "Event bus messages a busy peer did not take.", lambda: getattr(bus, "dropped", 0))
+
+
+def publish_change(entity: str, entity_id, op: str):
+    """
+    Announces a create/update/delete of a device or delivery to every worker.
+    """
+    bus.publish(f"{entity}.changed", {"id": entity_id, "op": op})
+
+
+class Broadcaster:
+    """
+    Fans payloads out to the asyncio queues of connected stream clients (SSE) of this worker.
+    `publish` may be called from any thread; slow clients lose messages instead of growing memory.
+    """
+
+    def __init__(self, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[1] is not queue]
+
+    def publish(self, payload: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, payload)
+            except RuntimeError:
+                # the loop is closed
+                self.unsubscribe(queue)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+def _offer(queue: asyncio.Queue, payload: Dict[str, Any]):
+    try:
+        queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        pass
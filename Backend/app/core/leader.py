@@ -0,0 +1,42 @@
+import hashlib
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.core.database import sqlite_url
+
+_held = {}
+
+
+def try_acquire(name: str) -> bool:
+    """
+    Non-blocking, host-wide lock so jobs like retention run in only one worker per database.
+    The lock is released when the process exits.
+    """
+    if name in _held:
+        return True
+    if fcntl is None:
+        return True
+
+    digest = hashlib.sha1(sqlite_url.encode()).hexdigest()[:12]
+    path = os.path.join(tempfile.gettempdir(), f"geolockbox-{name}-{digest}.lock")
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    _held[name] = fd
+    return True
+
+
+def release(name: str):
+    fd = _held.pop(name, None)
+    if fd is not None:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
@@ -0,0 +1,220 @@
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import ENV
+from app.core.metrics import register_gauge
+from app.models.log import Log
+from app.utils.helpers import generate_id
+
+# attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample"}
+_MAX_TEMPLATES = 10000
+_formatter = logging.Formatter()
+
+
+class RateLimiter:
+    """
+    Fixed one-minute window per (logger, message template). Suppressed records are
+    counted and reported on the next record of the same template that gets through.
+    The template is the unformatted message, so callers log with %-style arguments.
+    """
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._windows: "OrderedDict[tuple, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, record: logging.LogRecord) -> Optional[int]:
+        """
+        None when the record must be dropped, otherwise how many were suppressed before it.
+        """
+        if self.per_minute <= 0:
+            return 0
+        key = (record.name, str(record.msg))
+        minute = int(record.created // 60)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window[0] != minute:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [minute, 1, 0]
+                self._windows.move_to_end(key)
+                if len(self._windows) > _MAX_TEMPLATES:
+                    # the least recently started windows go first
+                    self._windows.popitem(last=False)
+                return suppressed
+            if window[1] >= self.per_minute:
+                window[2] += 1
+                return None
+            window[1] += 1
+            suppressed, window[2] = window[2], 0
+            return suppressed
+
+
+class DatabaseLogHandler(logging.Handler):
+    """
+    Queues records on the calling thread and writes them to the Log table in batches from a
+    background thread, so logging never waits on SQLite. Pass `extra={"sample": 0.01}` to keep
+    only a share of a noisy record; every template is also rate limited.
+    """
+
+    def __init__(
+        self,
+        engine,
+        level=logging.INFO,
+        batch_size: int = 500,
+        flush_seconds: float = 1.0,
+        queue_size: int = 10000,
+        rate_limit_per_minute: int = 60,
+        exclude: tuple = (),
+    ):
+        super().__init__(level)
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.exclude = tuple(exclude)
+        self.limiter = RateLimiter(rate_limit_per_minute)
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.dropped = 0
+
+    # ---------- request path ----------
+    def emit(self, record: logging.LogRecord):
+        if threading.current_thread() is self._thread:
+            # the writer's own failures must not feed back into the queue
+            return
+        if record.name.startswith(self.exclude):
+            return
+        sample = getattr(record, "sample", None)
+        if sample is not None and random.random() >= sample:
+            return
+        suppressed = self.limiter.allow(record)
+        if suppressed is None:
+            return
+
+        try:
+            row = self._to_row(record, suppressed)
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _to_row(self, record: logging.LogRecord, suppressed: int) -> Dict[str, Any]:
+        extra = {
+            "logger": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                extra[key] = value
+        if record.exc_info:
+            extra["exception"] = _formatter.formatException(record.exc_info)
+        if suppressed:
+            extra["suppressed"] = suppressed
+        return {
+            "id": generate_id("LOG"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "timestamp": datetime.fromtimestamp(record.created),
+            "extra": extra,
+        }
+
+    # ---------- writer thread ----------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def close(self):
+        self.stop()
+        super().close()
+
+    def _run(self):
+        running = True
+        while running:
+            batch = []
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is None:
+                    running = False
+                    break
+                batch.append(row)
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        for row in batch:
+            # `extra` can carry anything, store what JSON can't hold as text
+            row["extra"] = json.loads(json.dumps(row["extra"], default=str))
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(Log.__table__), batch)
+            self.written += len(batch)
+        except Exception as exc:
+            self.dropped += len(batch)
+            sys.stderr.write(f"DatabaseLogHandler: dropped {len(batch)} records: {exc}\n")
+
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+
+_handler: Optional[DatabaseLogHandler] = None
+
+
+def install(engine) -> DatabaseLogHandler:
+    """
+    Attaches the handler to the root logger next to the stderr one from basicConfig.
+    """
+    global _handler
+    if _handler is None:
+        _handler = DatabaseLogHandler(
+            engine,
+            level=logging.getLevelName(ENV.LOG_DB_LEVEL.upper()),
+            batch_size=ENV.LOG_DB_BATCH_SIZE,
+            flush_seconds=ENV.LOG_DB_FLUSH_SECONDS,
+            queue_size=ENV.LOG_DB_QUEUE_SIZE,
+            rate_limit_per_minute=ENV.LOG_DB_RATE_LIMIT_PER_MINUTE,
+            exclude=tuple(p.strip() for p in ENV.LOG_DB_EXCLUDE.split(",") if p.strip()),
+        )
+        register_gauge("geolockbox_log_queue_size", "Log records waiting to be written.", _handler.queued)
+        register_gauge("geolockbox_log_written_total", "Log records written to the database.", lambda: _handler.written)
+        register_gauge("geolockbox_log_dropped_total", "Log records dropped on a full queue or failed write.", lambda: _handler.dropped)
+    _handler.start()
+    logging.getLogger().addHandler(_handler)
+    return _handler
+
+
+def uninstall():
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        # flushes what is still queued
+        _handler.stop()
@@ -0,0 +1,202 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram keyed by a label tuple, rendered in Prometheus text format.
+    """
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # one slot per bucket, +Inf, then sum and count
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+            series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            base = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{{{base}{',' if base else ''}le=\"{le}\"}} {int(cumulative)}")
+            lines.append(f"{self.name}_sum{{{base}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{base}}} {int(series[-1])}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    return ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+
+
+REQUEST_LATENCY = Histogram(
+    "geolockbox_http_request_duration_seconds", "Request latency per route template.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    "geolockbox_http_requests_total", "Requests per route template and status code.",
+    ("method", "route", "status"),
+)
+RESPONSE_BYTES = Histogram(
+    "geolockbox_http_response_bytes", "Response body size per route template.",
+    ("method", "route"), BYTES_BUCKETS,
+)
+SQL_STATEMENTS = Histogram(
+    "geolockbox_sql_statements_per_request", "SQL statements executed per request.",
+    ("method", "route"), SQL_COUNT_BUCKETS,
+)
+SQL_TIME = Histogram(
+    "geolockbox_sql_duration_seconds_per_request", "Time spent in SQL per request.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+
+_gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+
+def register_gauge(name: str, help: str, fn: Callable[[], float]):
+    """
+    Gauges are sampled only when /metrics is scraped, so they add nothing to the request path.
+    """
+    _gauges[name] = (help, fn)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in (REQUESTS, REQUEST_LATENCY, RESPONSE_BYTES, SQL_STATEMENTS, SQL_TIME):
+        lines.extend(metric.render())
+    for name, (help, fn) in sorted(_gauges.items()):
+        try:
+            value = fn()
+        except Exception:
+            continue
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- SQL accounting ----------
+class RequestStats:
+    __slots__ = ("sql_count", "sql_time")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+
+
+# set by the middleware; sync endpoints run in a threadpool that copies the context, so they see it too
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = current_request.get()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - started
+
+
+def instrument_engine(engine):
+    # every create_app() calls this on the same engine, listeners must only be added once
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------- ASGI middleware ----------
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware) so the hot path stays a couple of dict lookups.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = [500]
+        size = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            labels = (scope["method"], route)
+            REQUESTS.inc(labels + (str(status[0]),))
+            REQUEST_LATENCY.observe(labels, elapsed)
+            RESPONSE_BYTES.observe(labels, size[0])
+            SQL_STATEMENTS.observe(labels, stats.sql_count)
+            SQL_TIME.observe(labels, stats.sql_time)
@@ -0,0 +1,300 @@
+import asyncio
+import cProfile
+import functools
+import itertools
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+from app.core.config import ENV
+
+MAX_STATEMENTS = 200
+TOP_FUNCTIONS = 25
+
+
+class ProfilerSettings:
+    def __init__(self):
+        self.enabled = ENV.PROFILING_ENABLED
+        self.sample_rate = ENV.PROFILING_SAMPLE_RATE  # share of requests run under cProfile
+        self.threshold_ms = ENV.PROFILING_THRESHOLD_MS  # only requests at least this slow are kept
+        self.buffer_size = ENV.PROFILING_BUFFER_SIZE
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "threshold_ms": self.threshold_ms,
+            "buffer_size": self.buffer_size,
+        }
+
+
+class Capture:
+    __slots__ = (
+        "id", "method", "path", "route", "status", "started_at", "duration_ms",
+        "statements", "dropped_statements", "profile", "stats",
+    )
+
+    def __init__(self, capture_id: int, method: str, path: str, profile: bool):
+        self.id = capture_id
+        self.method = method
+        self.path = path
+        self.route = None
+        self.status = None
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_ms = 0.0
+        self.statements: List[Dict[str, Any]] = []
+        self.dropped_statements = 0
+        self.profile = profile
+        self.stats = None  # pstats-compatible dict once profiled
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 2),
+            "sql_count": len(self.statements) + self.dropped_statements,
+            "sql_ms": round(sum(s["duration_ms"] for s in self.statements), 2),
+            "profiled": self.stats is not None,
+        }
+
+    def detail(self) -> Dict[str, Any]:
+        data = self.summary()
+        data["statements"] = self.statements
+        data["dropped_statements"] = self.dropped_statements
+        data["top_functions"] = top_functions(self.stats) if self.stats else []
+        return data
+
+
+def top_functions(stats: Dict, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{filename}:{line}({name})",
+            "calls": nc,
+            "total_ms": round(tt * 1000, 3),
+            "cumulative_ms": round(ct * 1000, 3),
+        }
+        for (filename, line, name), (cc, nc, tt, ct, callers) in rows
+    ]
+
+
+class SlowRequestProfiler:
+    """
+    Runtime-switchable capture of slow requests into a bounded ring buffer.
+    """
+
+    def __init__(self):
+        self.settings = ProfilerSettings()
+        self._captures: deque = deque(maxlen=self.settings.buffer_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def configure(self, **changes):
+        with self._lock:
+            for key, value in changes.items():
+                if value is not None:
+                    setattr(self.settings, key, value)
+            if self._captures.maxlen != self.settings.buffer_size:
+                self._captures = deque(self._captures, maxlen=self.settings.buffer_size)
+
+    def start(self, method: str, path: str) -> Capture:
+        profile = random.random() < self.settings.sample_rate
+        return Capture(next(self._ids), method, path, profile)
+
+    def finish(self, capture: Capture):
+        if capture.duration_ms < self.settings.threshold_ms:
+            return
+        with self._lock:
+            self._captures.append(capture)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            captures = list(self._captures)
+        return [c.summary() for c in reversed(captures)]
+
+    def get(self, capture_id: int) -> Optional[Capture]:
+        with self._lock:
+            for capture in self._captures:
+                if capture.id == capture_id:
+                    return capture
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._captures.clear()
+
+
+profiler = SlowRequestProfiler()
+current_capture: ContextVar[Optional[Capture]] = ContextVar("current_capture", default=None)
+
+# cProfile hooks the calling thread; async endpoints share the event loop thread, so only one at a time
+_profiling_thread = threading.local()
+
+
+def dump_profile(capture: Capture) -> bytes:
+    """
+    Same bytes pstats.Stats.dump_stats() writes, loadable by pstats, snakeviz, tuna, etc.
+    """
+    return marshal.dumps(capture.stats)
+
+
+def _store_profile(capture: Capture, prof: cProfile.Profile):
+    stats = pstats.Stats(prof)
+    capture.stats = stats.stats
+
+
+def _profiled(endpoint):
+    # include_router re-creates routes with the already wrapped endpoint
+    if getattr(endpoint, "_profiled", False):
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            capture = current_capture.get()
+            if capture is None or not capture.profile or getattr(_profiling_thread, "active", False):
+                return await endpoint(*args, **kwargs)
+            prof = cProfile.Profile()
+            _profiling_thread.active = True
+            prof.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                prof.disable()
+                _profiling_thread.active = False
+                _store_profile(capture, prof)
+        async_wrapper._profiled = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        capture = current_capture.get()
+        if capture is None or not capture.profile or getattr(_profiling_thread, "active", False):
+            return endpoint(*args, **kwargs)
+        prof = cProfile.Profile()
+        _profiling_thread.active = True
+        prof.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            prof.disable()
+            _profiling_thread.active = False
+            _store_profile(capture, prof)
+    wrapper._profiled = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class that can run its endpoint under cProfile. The endpoint runs in the worker
+    thread FastAPI picks for it, which a middleware cannot reach.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+
+class _CountingCursor:
+    """
+    Stands in for the DB-API cursor of a captured SELECT and counts the rows the result fetches;
+    SQLite reports rowcount -1 for reads.
+    """
+
+    __slots__ = ("_cursor", "_entry")
+
+    def __init__(self, cursor, entry: Dict[str, Any]):
+        self._cursor = cursor
+        self._entry = entry
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._entry["rows"] += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._entry["rows"] += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._entry["rows"] += len(rows)
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_capture.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    capture = current_capture.get()
+    if capture is None:
+        return
+    started = conn.info["profile_query_start"].pop()
+    if len(capture.statements) >= MAX_STATEMENTS:
+        capture.dropped_statements += 1
+        return
+    entry = {
+        "statement": statement,
+        "executemany": executemany,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        # affected rows for writes
+        "rows": cursor.rowcount,
+    }
+    if cursor.description is not None and context is not None:
+        # rows come back later: count them as the result fetches them
+        entry["rows"] = 0
+        context.cursor = _CountingCursor(cursor, entry)
+    capture.statements.append(entry)
+
+
+def instrument_engine(engine):
+    # every create_app() calls this on the same engine, listeners must only be added once
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiler.settings.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        capture = profiler.start(scope["method"], scope["path"])
+        token = current_capture.set(capture)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                capture.status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            capture.duration_ms = (time.perf_counter() - started) * 1000
+            current_capture.reset(token)
+            capture.route = getattr(scope.get("route"), "path", None)
+            profiler.finish(capture)
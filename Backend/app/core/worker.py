@@ -0,0 +1,49 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+from app.core import leader
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """
+    Background thread that calls `job` every `interval` seconds until stopped.
+    With `lock`, every worker process runs the thread but only the one holding the host-wide
+    lock calls the job; the others try to take it over each cycle, so the job survives its
+    leader exiting.
+    """
+
+    def __init__(self, name: str, interval: float, job: Callable[[], None], lock: Optional[str] = None):
+        self.name = name
+        self.interval = interval
+        self.job = job
+        self.lock = lock
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self.lock:
+            leader.release(self.lock)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.lock and not leader.try_acquire(self.lock):
+                self._stop.wait(self.interval)
+                continue
+            try:
+                self.job()
+            except Exception:
+                logger.exception("%s cycle failed", self.name)
+            self._stop.wait(self.interval)
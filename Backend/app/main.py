@@ -1,12 +1,7 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes.routes import routes
-
-app = FastAPI(
-    title="GeoLockBox API",
-    description="API para gerenciamento do sistema GeoLockBox - dispositivos inteligentes de segurança em entregas",
-    version="1.0.0"
-)
+from app.core.config import ENV, apply_timezone, configure_logging
 
 origins = [
     "http://localhost",
@@ -14,21 +9,110 @@ origins = [
     "*",
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-app.include_router(routes)
+def startup():
+    """
+    Runs once per worker before it takes requests: schema setup, then the background jobs.
+    """
+    from app.core import log_handler
+    from app.core.database import engine
+    from app.core.events import bus
+    from app.services.eta_service import eta_worker
+    from app.services.log_service import ensure_log_search
+    from app.services.retention_service import retention_worker
+    from app.services.trajectory_service import ensure_spatial_index
+    from app.utils.helpers import create_db_and_tables
+
+    configure_logging()
+    create_db_and_tables(engine)
+    ensure_log_search(engine)
+    ensure_spatial_index(engine)
+    if ENV.LOG_DB_ENABLED:
+        log_handler.install(engine)
+    bus.start()
+    # every worker starts them, only the one holding each job's lock runs it
+    if ENV.TELEMETRY_RETENTION_ENABLED:
+        retention_worker.start()
+    if ENV.ETA_ENABLED:
+        eta_worker.start()
+
+
+def shutdown():
+    from app.core import cpu_pool, log_handler
+    from app.core.events import bus
+    from app.services.eta_service import eta_worker
+    from app.services.retention_service import retention_worker
+
+    eta_worker.stop()
+    retention_worker.stop()
+    bus.stop()
+    cpu_pool.shutdown()
+    log_handler.uninstall()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup()
+    yield
+    shutdown()
+
+
+def create_app() -> FastAPI:
+    """
+    Builds the API. Importing this module stays cheap; routers and their dependencies are
+    only loaded here, and heavy optional libraries (geopy, passlib, jose) on first use.
+
+        uvicorn --factory app.main:create_app
+    """
+    apply_timezone()
+
+    from app.core import profiling
+    from app.core.database import engine
+    from app.core.metrics import MetricsMiddleware, instrument_engine, register_gauge
+    from app.routes.routes import routes
+
+    app = FastAPI(
+        title="GeoLockBox API",
+        description="API para gerenciamento do sistema GeoLockBox - dispositivos inteligentes de segurança em entregas",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # always installed: it is a no-op until profiling is switched on at runtime
+    profiling.instrument_engine(engine)
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    if ENV.METRICS_ENABLED:
+        instrument_engine(engine)
+        if hasattr(engine.pool, "checkedout"):
+            register_gauge("geolockbox_db_connections_in_use", "Checked-out database connections.", engine.pool.checkedout)
+        app.add_middleware(MetricsMiddleware)
+
+    app.include_router(routes)
+
+    @app.get("/")
+    def read_root():
+        return {"message": "Bem-vindo à API do GeoLockBox!"}
+
+    return app
+
 
-@app.get("/")
-def read_root():
-    return {"message": "Bem-vindo à API do GeoLockBox!"}
+def __getattr__(name):
+    # `uvicorn app.main:app` keeps working, the app is built on first access
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("app.main:create_app", factory=True, host="0.0.0.0", port=8000, reload=True)
@@ -1,10 +1,15 @@
-from sqlmodel import SQLModel, Field, Column
+from sqlmodel import SQLModel, Field, Column, Index
 from typing import Optional, Dict, Any
 from sqlalchemy import JSON
 from datetime import datetime
 
 
 class Delivery(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_delivery_status", "status"),
+        Index("ix_delivery_device_id", "device_id"),
+    )
+
     id: str = Field(default=None, primary_key=True)
 
     order_number: Optional[str] = None
@@ -0,0 +1,25 @@
+from sqlmodel import SQLModel, Field, Index
+from typing import Optional
+from datetime import datetime
+
+
+class GeofenceEvent(SQLModel, table=True):
+    __tablename__ = "geofence_event"
+    __table_args__ = (
+        Index("ix_geofence_event_device_timestamp", "device_id", "timestamp"),
+        Index("ix_geofence_event_delivery_timestamp", "delivery_id", "timestamp"),
+        Index("ix_geofence_event_timestamp", "timestamp"),
+    )
+
+    # derived from device, delivery, type and time, so two workers can't store the same event twice
+    id: str = Field(default=None, primary_key=True)
+
+    device_id: str
+    delivery_id: Optional[str] = None
+    type: str  # enter / exit / dwell
+    timestamp: datetime
+
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    distance_m: Optional[float] = None  # from the delivery destination
+    telemetry_id: Optional[str] = None
@@ -1,11 +1,20 @@
-from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import JSON
+from sqlmodel import SQLModel, Field, Column, Index
+from sqlalchemy import JSON, Integer
 from typing import Optional, Dict, Any
 from datetime import datetime
 
 
 class Log(SQLModel, table=True):
-    id: str = Field(default=None, primary_key=True)
+    __table_args__ = (
+        Index("ix_log_timestamp", "timestamp"),
+        Index("ix_log_level_timestamp", "level", "timestamp"),
+    )
+    # rows are looked up by id; seq is the rowid the full-text index points at
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    # INTEGER PRIMARY KEY, so VACUUM can't renumber the rows under the full-text index
+    seq: Optional[int] = Field(default=None, sa_column=Column(Integer, primary_key=True))
+    id: str = Field(default=None, unique=True, nullable=False)
 
     level: Optional[str] = None
     message: Optional[str] = None
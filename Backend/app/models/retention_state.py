@@ -0,0 +1,8 @@
+from sqlmodel import SQLModel, Field
+
+
+class RetentionState(SQLModel, table=True):
+    __tablename__ = "retention_state"
+
+    name: str = Field(primary_key=True)
+    value: int = 0
@@ -1,10 +1,20 @@
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Column, Index
+from sqlalchemy import Integer
 from typing import Optional
 from datetime import datetime
 
 
 class Telemetry(SQLModel, table=True):
-    id: str = Field(default=None, primary_key=True)
+    __table_args__ = (
+        Index("ix_telemetry_device_timestamp", "device_id", "timestamp"),
+        {"sqlite_autoincrement": True},
+    )
+    # rows are looked up by id; seq only orders them for the rollups and keys the R*-tree
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    # INTEGER PRIMARY KEY AUTOINCREMENT: the rowid, never reused after deletes and kept by VACUUM
+    seq: Optional[int] = Field(default=None, sa_column=Column(Integer, primary_key=True))
+    id: str = Field(default=None, unique=True, nullable=False)
 
     device_id: Optional[str] = None
     latitude: Optional[float] = None
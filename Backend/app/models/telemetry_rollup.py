@@ -0,0 +1,32 @@
+from sqlmodel import SQLModel, Field, Index
+from typing import Optional
+from datetime import datetime
+
+
+class TelemetryRollup(SQLModel, table=True):
+    __tablename__ = "telemetry_rollup"
+    __table_args__ = (
+        Index("ix_telemetry_rollup_device_resolution_bucket", "device_id", "resolution", "bucket_start"),
+    )
+
+    # "<device_id>|<resolution>|<bucket epoch>", makes re-running a bucket an upsert
+    id: str = Field(default=None, primary_key=True)
+
+    device_id: str
+    resolution: int  # bucket size in seconds (60 = 1 min, 3600 = 1 h)
+    bucket_start: datetime
+
+    count: int = 0
+
+    # representative position: last point of the bucket
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    last_timestamp: Optional[datetime] = None
+
+    speed_min: Optional[float] = None
+    speed_max: Optional[float] = None
+    speed_avg: Optional[float] = None
+
+    battery_min: Optional[int] = None
+    battery_max: Optional[int] = None
+    battery_avg: Optional[float] = None
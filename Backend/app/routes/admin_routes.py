@@ -0,0 +1,58 @@
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from app.core.profiling import ProfiledRoute
+from app.core.profiling import profiler, dump_profile
+from app.utils.security import get_current_user
+from app.schemas.profiling_schemas import *
+
+
+# captures hold request paths, SQL and stack profiles: logged-in users only
+router = APIRouter(route_class=ProfiledRoute, dependencies=[Depends(get_current_user)])
+
+
+@router.get("/profiling", response_model=ProfilingSettings)
+def get_profiling():
+    return profiler.settings.as_dict()
+
+
+@router.put("/profiling", response_model=ProfilingSettings)
+def update_profiling(settings: ProfilingSettingsUpdate):
+    profiler.configure(**settings.model_dump(exclude_unset=True))
+    return profiler.settings.as_dict()
+
+
+@router.get("/profiling/captures")
+def list_captures() -> List[Dict[str, Any]]:
+    return profiler.list()
+
+
+@router.delete("/profiling/captures", status_code=204)
+def clear_captures():
+    profiler.clear()
+    return
+
+
+@router.get("/profiling/captures/{capture_id}")
+def get_capture(capture_id: int) -> Dict[str, Any]:
+    capture = profiler.get(capture_id)
+    if not capture:
+        raise HTTPException(status_code=404, detail=f"Capture {capture_id} not found")
+    return capture.detail()
+
+
+@router.get("/profiling/captures/{capture_id}/profile")
+def download_profile(capture_id: int):
+    """
+    cProfile dump of the request, open it with `python -m pstats`, snakeviz or tuna.
+    """
+    capture = profiler.get(capture_id)
+    if not capture:
+        raise HTTPException(status_code=404, detail=f"Capture {capture_id} not found")
+    if capture.stats is None:
+        raise HTTPException(status_code=404, detail=f"Capture {capture_id} was not profiled")
+    return Response(
+        dump_profile(capture),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="capture-{capture_id}.prof"'},
+    )
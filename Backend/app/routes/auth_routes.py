@@ -1,15 +1,16 @@
-import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session, select
 
+from app.core.profiling import ProfiledRoute
 from app.core.database import get_session
 from app.models.user import User
+from app.utils.helpers import generate_id
 from app.utils.security import create_access_token
 from app.schemas.user_schema import UserCreate, UserRead
 from app.schemas.auth_schemas import LoginModel
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/register", response_model=UserRead, status_code=201)
 def register(user: UserCreate, db: Session = Depends(get_session)):
@@ -22,7 +23,7 @@ def register(user: UserCreate, db: Session = Depends(get_session)):
         )
     
     db_user = User(
-        id=f"USR-{uuid.uuid4().hex[:8].upper()}",
+        id=generate_id("USR"),
         username=user.username,
         name=user.name,
         role=user.role,
@@ -1,14 +1,20 @@
-from typing import List
-from fastapi import Depends, APIRouter
+from typing import List, Optional
+from fastapi import Depends, APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import select, Session
 
+from app.core.profiling import ProfiledRoute
 from app.core.database import get_session
+from app.core.events import publish_change
 from app.utils.helpers import generate_id, get_or_404
+from app.services.bulk_service import parse_rows, validate_rows, bulk_upsert
+from app.services.eta_service import get_etas
 from app.models.delivery import Delivery
 from app.schemas.delivery_schemas import *
+from app.schemas.bulk_schemas import BulkResult
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("", response_model=DeliveryRead, status_code=201)
@@ -18,14 +24,50 @@ def create_delivery(delivery: DeliveryCreate, session: Session = Depends(get_ses
     session.add(db_delivery)
     session.commit()
     session.refresh(db_delivery)
+    publish_change("delivery", delivery_id, "create")
     return db_delivery
 
 
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_upsert_deliveries(request: Request, session: Session = Depends(get_session)):
+    """
+    Creates or updates many deliveries at once from a JSON array or a CSV file (Content-Type: text/csv).
+    Invalid rows, and rows the database rejects, are reported back and do not abort the rest
+    of the batch. A field missing from a row (or an empty CSV cell) keeps its stored value,
+    an explicit null clears it.
+    """
+    rows = parse_rows(await request.body(), request.headers.get("content-type", ""))
+    valid, errors = validate_rows(rows, DeliveryCreate, "DEL")
+    written, write_errors = await run_in_threadpool(bulk_upsert, session, Delivery, valid)
+    errors = sorted(errors + write_errors, key=lambda e: e["index"])
+    publish_change("delivery", None, "bulk")
+    return BulkResult(received=len(rows), written=written, errors=errors)
+
+
 @router.get("", response_model=List[DeliveryRead])
 def list_deliveries(session: Session = Depends(get_session)):
     return session.exec(select(Delivery)).all()
 
 
+@router.get("/eta", response_model=List[DeliveryEtaRead])
+def list_etas(device_id: Optional[str] = None, session: Session = Depends(get_session)):
+    """
+    ETAs of the active deliveries as of the last background cycle, served from memory.
+    """
+    etas = get_etas(session).values()
+    if device_id:
+        etas = [e for e in etas if e.device_id == device_id]
+    return [e._asdict() for e in etas]
+
+
+@router.get("/{delivery_id}/eta", response_model=DeliveryEtaRead)
+def get_eta(delivery_id: str, session: Session = Depends(get_session)):
+    eta = get_etas(session).get(delivery_id)
+    if eta is None:
+        raise HTTPException(status_code=404, detail=f"No active delivery {delivery_id}")
+    return eta._asdict()
+
+
 @router.get("/{delivery_id}", response_model=DeliveryRead)
 def get_delivery(delivery_id: str, session: Session = Depends(get_session)):
     return get_or_404(session, Delivery, delivery_id)
@@ -42,11 +84,13 @@ def put_delivery(delivery_id: str, delivery: DeliveryCreate, session: Session =
         session.add(existing)
         session.commit()
         session.refresh(existing)
+        publish_change("delivery", delivery_id, "update")
         return existing
     new = Delivery(id=delivery_id, **payload)
     session.add(new)
     session.commit()
     session.refresh(new)
+    publish_change("delivery", delivery_id, "create")
     return new
 
 
@@ -58,6 +102,7 @@ def patch_delivery(delivery_id: str, delivery: DeliveryUpdate, session: Session
     session.add(existing)
     session.commit()
     session.refresh(existing)
+    publish_change("delivery", delivery_id, "update")
     return existing
 
 
@@ -66,4 +111,5 @@ def delete_delivery(delivery_id: str, session: Session = Depends(get_session)):
     existing = get_or_404(session, Delivery, delivery_id)
     session.delete(existing)
     session.commit()
+    publish_change("delivery", delivery_id, "delete")
     return
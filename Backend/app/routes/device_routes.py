@@ -1,17 +1,23 @@
 from typing import List
-from fastapi import Depends, APIRouter
+from fastapi import Depends, APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import select, Session
 from datetime import datetime, timezone
 
+from app.core.profiling import ProfiledRoute
+from app.core.config import ENV
 from app.core.database import get_session
+from app.core.events import publish_change
 from app.utils.helpers import generate_id, get_or_404
-from app.services.lock_services import is_in_geofence
+from app.services.bulk_service import parse_rows, validate_rows, bulk_upsert
+from app.services.lock_services import is_in_geofence, get_lock_target
+from app.services.gps_service import gps_filter
 from app.models.device import Device
-from app.models.delivery import Delivery
 from app.schemas.device_schema import *
+from app.schemas.bulk_schemas import BulkResult
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("", response_model=DeviceRead, status_code=201)
@@ -21,9 +27,26 @@ def create_device(device: DeviceCreate, session: Session = Depends(get_session))
     session.add(db_device)
     session.commit()
     session.refresh(db_device)
+    publish_change("device", device_id, "create")
     return db_device
 
 
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_upsert_devices(request: Request, session: Session = Depends(get_session)):
+    """
+    Creates or updates many devices at once from a JSON array or a CSV file (Content-Type: text/csv).
+    Invalid rows, and rows the database rejects, are reported back and do not abort the rest
+    of the batch. A field missing from a row (or an empty CSV cell) keeps its stored value,
+    an explicit null clears it.
+    """
+    rows = parse_rows(await request.body(), request.headers.get("content-type", ""))
+    valid, errors = validate_rows(rows, DeviceCreate, "BOX")
+    written, write_errors = await run_in_threadpool(bulk_upsert, session, Device, valid)
+    errors = sorted(errors + write_errors, key=lambda e: e["index"])
+    publish_change("device", None, "bulk")
+    return BulkResult(received=len(rows), written=written, errors=errors)
+
+
 @router.get("", response_model=List[DeviceRead])
 def list_devices(session: Session = Depends(get_session)):
     return session.exec(select(Device)).all()
@@ -45,18 +68,28 @@ def put_device(device_id: str, device: DeviceCreate, session: Session = Depends(
         session.add(existing)
         session.commit()
         session.refresh(existing)
+        publish_change("device", device_id, "update")
         return existing
     new = Device(id=device_id, **payload)
     session.add(new)
     session.commit()
     session.refresh(new)
+    publish_change("device", device_id, "create")
     return new
 
 
 @router.patch("/{device_id}", response_model=DeviceRead)
 def patch_device(device_id: str, device: DeviceUpdate, session: Session = Depends(get_session)):
     existing = get_or_404(session, Device, device_id)
-    for k, v in device.model_dump(exclude_unset=True).items():
+    payload = device.model_dump(exclude_unset=True)
+
+    # a position that the telemetry filter would reject must not move the box (and open its lock)
+    if ENV.GPS_FILTER_ENABLED and payload.get("latitude") is not None and payload.get("longitude") is not None:
+        if not gps_filter.is_plausible(device_id, payload["latitude"], payload["longitude"]):
+            payload.pop("latitude")
+            payload.pop("longitude")
+
+    for k, v in payload.items():
         setattr(existing, k, v)
 
     existing.last_update = datetime.now(timezone.utc)
@@ -64,6 +97,7 @@ def patch_device(device_id: str, device: DeviceUpdate, session: Session = Depend
     session.add(existing)
     session.commit()
     session.refresh(existing)
+    publish_change("device", device_id, "update")
     return existing
 
 
@@ -72,6 +106,7 @@ def delete_device(device_id: str, session: Session = Depends(get_session)):
     existing = get_or_404(session, Device, device_id)
     session.delete(existing)
     session.commit()
+    publish_change("device", device_id, "delete")
     return
 
 
@@ -79,9 +114,7 @@ def delete_device(device_id: str, session: Session = Depends(get_session)):
 def get_device(device_id: str, session: Session = Depends(get_session)):
     device = get_or_404(session, Device, device_id)
 
-    delivery = session.exec(
-        select(Delivery).where(Delivery.device_id == device_id)
-    ).first()
+    delivery = get_lock_target(session, device_id)
 
     if not delivery:
         return {"lock": "close"}
@@ -0,0 +1,85 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import Depends, APIRouter, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlmodel import select, Session
+
+from app.core.profiling import ProfiledRoute
+from app.core.database import get_session
+from app.models.geofence_event import GeofenceEvent
+from app.services.geofence_service import geofence_stream
+from app.schemas.geofence_schemas import *
+
+KEEPALIVE_SECONDS = 15
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("/events", response_model=List[GeofenceEventRead])
+def list_events(
+    device_id: Optional[str] = None,
+    delivery_id: Optional[str] = None,
+    type: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    session: Session = Depends(get_session),
+):
+    """
+    Enter/exit/dwell events, newest first.
+    """
+    q = select(GeofenceEvent)
+    if device_id:
+        q = q.where(GeofenceEvent.device_id == device_id)
+    if delivery_id:
+        q = q.where(GeofenceEvent.delivery_id == delivery_id)
+    if type:
+        q = q.where(GeofenceEvent.type == type)
+    if start:
+        q = q.where(GeofenceEvent.timestamp >= start)
+    if end:
+        q = q.where(GeofenceEvent.timestamp < end)
+    return session.exec(q.order_by(GeofenceEvent.timestamp.desc()).limit(limit)).all()
+
+
+@router.get("/events/stream")
+async def stream_events(device_id: Optional[str] = None, delivery_id: Optional[str] = None):
+    """
+    Server-sent events: one `enter`, `exit` or `dwell` message per event as it is detected.
+    """
+    queue = geofence_stream.subscribe()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if device_id and event["device_id"] != device_id:
+                    continue
+                if delivery_id and event["delivery_id"] != delivery_id:
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            geofence_stream.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/summary", response_model=GeofenceSummary)
+def summary(since: Optional[datetime] = None, session: Session = Depends(get_session)):
+    """
+    Event counts per type since `since` (default: last 24 h), e.g. for the dashboard alert card.
+    """
+    since = since or datetime.now() - timedelta(days=1)
+    rows = session.exec(
+        select(GeofenceEvent.type, func.count())
+        .where(GeofenceEvent.timestamp >= since)
+        .group_by(GeofenceEvent.type)
+    ).all()
+    return GeofenceSummary(since=since, **{t: n for t, n in rows})
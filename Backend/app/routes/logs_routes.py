@@ -1,14 +1,20 @@
-from typing import List
-from fastapi import Depends, APIRouter
+from datetime import datetime
+from typing import List, Optional
+from fastapi import Depends, APIRouter, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import select, Session
 
+from app.core.profiling import ProfiledRoute
 from app.core.database import get_session
 from app.utils.helpers import generate_id, get_or_404
+from app.services.bulk_service import parse_rows, validate_rows, bulk_upsert
+from app.services.log_service import search_logs
 from app.models.log import Log
 from app.schemas.log_schema import *
+from app.schemas.bulk_schemas import BulkResult
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("", response_model=LogRead, status_code=201)
@@ -21,11 +27,43 @@ def create_log(log: LogCreate, session: Session = Depends(get_session)):
     return db_log
 
 
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_upsert_logs(request: Request, session: Session = Depends(get_session)):
+    """
+    Stores many log entries in one transaction from a JSON array or a CSV file (Content-Type: text/csv).
+    Invalid rows, and rows the database rejects, are reported back and do not abort the rest
+    of the batch.
+    """
+    rows = parse_rows(await request.body(), request.headers.get("content-type", ""))
+    valid, errors = validate_rows(rows, LogCreate, "LOG")
+    written, write_errors = await run_in_threadpool(bulk_upsert, session, Log, valid)
+    errors = sorted(errors + write_errors, key=lambda e: e["index"])
+    return BulkResult(received=len(rows), written=written, errors=errors)
+
+
 @router.get("", response_model=List[LogRead])
 def list_logs(session: Session = Depends(get_session)):
     return session.exec(select(Log)).all()
 
 
+@router.get("/search", response_model=LogPage)
+def search(
+    q: Optional[str] = None,
+    level: Optional[List[str]] = Query(None),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    session: Session = Depends(get_session),
+):
+    """
+    Newest logs first. `q` is full-text over the message (every word must match, `word*` for a prefix),
+    `level` can be repeated, and `next_cursor` from a page is passed back as `cursor` for the next one.
+    """
+    items, next_cursor = search_logs(session, q, level, start, end, cursor, limit)
+    return LogPage(items=items, next_cursor=next_cursor)
+
+
 @router.get("/{log_id}", response_model=LogRead)
 def get_log(log_id: str, session: Session = Depends(get_session)):
     return get_or_404(session, Log, log_id)
@@ -7,6 +7,10 @@ from app.routes.delivery_routes import router as delivery_router
 from app.routes.telemetry_routes import router as telemetry_routes
 from app.routes.logs_routes import router as log_router
 from app.routes.tracking import router as tracking_router
+from app.routes.geofence_routes import router as geofence_router
+from app.routes.trajectory_routes import router as trajectory_router
+from app.routes.metrics_routes import router as metrics_router
+from app.routes.admin_routes import router as admin_router
 
 
 routes = APIRouter()
@@ -19,3 +23,7 @@ routes.include_router(delivery_router, prefix="/deliveries", tags=["Deliveries"]
 routes.include_router(telemetry_routes, prefix="/telemetry", tags=["Telemetry"])
 routes.include_router(log_router, prefix="/logs", tags=["Logs"])
 routes.include_router(tracking_router, prefix="/tracking", tags=["Tracking"])
+routes.include_router(geofence_router, prefix="/geofence", tags=["Geofence"])
+routes.include_router(trajectory_router, prefix="/trajectory", tags=["Trajectory"])
+routes.include_router(admin_router, prefix="/admin", tags=["Admin"])
+routes.include_router(metrics_router, tags=["Metrics"])
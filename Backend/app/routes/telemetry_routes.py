@@ -1,26 +1,108 @@
 from typing import List
-from fastapi import Depends, APIRouter
+from datetime import datetime
+from fastapi import Depends, APIRouter, HTTPException, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select, Session
 
+from app.core.profiling import ProfiledRoute
+from app.core.config import ENV
 from app.core.database import get_session
 from app.utils.helpers import generate_id, get_or_404
 from app.models.telemetry import Telemetry
+from app.services.gps_service import gps_filter, ACCEPTED, DUPLICATE
+from app.services.geofence_service import detect_events
+from app.services.retention_service import get_tiers, pick_resolution, query_series
+from app.services.wire_service import CONTENT_TYPE, ingest_frames
 from app.schemas.telemetry_schemas import *
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("", status_code=201)
-def create_telemetry(tel: TelemetryCreate, session: Session = Depends(get_session)):
-    tel_id = tel.id or generate_id("TEL")
-    db_tel = Telemetry(id=tel_id, **tel.model_dump(exclude={"id"}, exclude_none=True))
+def create_telemetry(
+    tel: TelemetryCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    session: Session = Depends(get_session),
+):
+    """
+    Stores a telemetry point after the GPS cleaning stage. Retries of an already stored point
+    return it with 200; points rejected by the filter are answered with 202 and not stored.
+    An `Idempotency-Key` maps to a deterministic ID, so retries are caught by every worker.
+    """
+    payload = tel.model_dump(exclude={"id"}, exclude_none=True)
+
+    if tel.id:
+        tel_id = tel.id
+    elif idempotency_key:
+        tel_id = generate_id("TEL", key=f"{tel.device_id}|{idempotency_key}", at=tel.timestamp)
+    else:
+        tel_id = generate_id("TEL")
+
+    if tel.id or idempotency_key:
+        existing = session.get(Telemetry, tel_id)
+        if existing:
+            response.status_code = 200
+            return existing
+
+    result = None
+    if ENV.GPS_FILTER_ENABLED and tel.device_id:
+        result = gps_filter.process(
+            tel.device_id, tel.latitude, tel.longitude, tel.timestamp, key=idempotency_key or tel.id
+        )
+        if result.status == DUPLICATE:
+            response.status_code = 200
+            existing = session.get(Telemetry, result.telemetry_id) if result.telemetry_id else None
+            return existing or {"accepted": False, "reason": result.status}
+        if result.status != ACCEPTED:
+            response.status_code = 202
+            return {"accepted": False, "reason": result.status}
+        payload["latitude"] = result.latitude
+        payload["longitude"] = result.longitude
+
+    db_tel = Telemetry(id=tel_id, **payload)
     session.add(db_tel)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError:
+        # another worker stored the same point first
+        session.rollback()
+        response.status_code = 200
+        return get_or_404(session, Telemetry, tel_id)
+    except Exception:
+        # nothing was stored, the client's retry must not be taken for a duplicate
+        session.rollback()
+        if result is not None:
+            gps_filter.discard(tel.device_id, result.key, tel.latitude, tel.longitude, tel.timestamp)
+        raise
     session.refresh(db_tel)
+
+    if result is not None:
+        gps_filter.bind(tel.device_id, result.key, tel_id)
+    if ENV.GEOFENCE_EVENTS_ENABLED and detect_events(session, db_tel):
+        # storing the events expired the row
+        session.refresh(db_tel)
     return db_tel
 
 
+@router.post("/frames", response_model=TelemetryFrameResult)
+async def create_telemetry_frames(request: Request, session: Session = Depends(get_session)):
+    """
+    Stores many points at once from binary frames (Content-Type: application/vnd.geolockbox.telemetry,
+    layout in app/services/wire_service.py). Rejected and already stored points are counted, not stored.
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith((CONTENT_TYPE, "application/octet-stream")):
+        raise HTTPException(status_code=415, detail=f"Expected {CONTENT_TYPE}")
+    body = await request.body()
+    if len(body) > ENV.TELEMETRY_FRAME_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Body larger than {ENV.TELEMETRY_FRAME_MAX_BYTES} bytes")
+    result = await run_in_threadpool(ingest_frames, session, body)
+    return TelemetryFrameResult(**result._asdict())
+
+
 @router.get("", response_model=List[TelemetryRead])
 def list_telemetry(device_id: Optional[str] = None, session: Session = Depends(get_session)):
     q = select(Telemetry)
@@ -29,6 +111,28 @@ def list_telemetry(device_id: Optional[str] = None, session: Session = Depends(g
     return session.exec(q).all()
 
 
+@router.get("/history", response_model=TelemetrySeries)
+def telemetry_history(
+    device_id: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+    resolution: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    """
+    Device history between `start` and `end`. Without `resolution` (0, 60 or 3600 seconds)
+    the finest retention tier that still covers the range is used.
+    """
+    end = end or datetime.now()
+    if resolution is None:
+        resolution = pick_resolution(start, end)
+    elif resolution not in {t.resolution for t in get_tiers()}:
+        raise HTTPException(status_code=400, detail=f"Unsupported resolution {resolution}")
+
+    points = query_series(session, device_id, start, end, resolution)
+    return TelemetrySeries(device_id=device_id, resolution=resolution, points=points)
+
+
 @router.get("/{tel_id}", response_model=TelemetryRead)
 def get_telemetry(tel_id: str, session: Session = Depends(get_session)):
     return get_or_404(session, Telemetry, tel_id)
@@ -1,24 +1,25 @@
 import json
-from datetime import datetime
-from fastapi import APIRouter, HTTPException
-from geopy.distance import geodesic
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
 
+from app.core.profiling import ProfiledRoute
 from app.models.delivery import Delivery
 from app.models.telemetry import Telemetry
 from app.models.device import Device
 from app.core.database import get_session
+from app.core.config import ENV
+from app.core.cpu_pool import run_cpu
+from app.services.tracking_service import summarize_track
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.get("/{delivery_id}/generate")
-async def generate_tracking_file(delivery_id: str):
+async def generate_tracking_file(delivery_id: str, session: Session = Depends(get_session)):
     """
     Generates a device_tracking_log.json file based on the actual telemetry recorded in the database.
     """
 
-    session = get_session()
-
     delivery = session.query(Delivery).filter_by(id=delivery_id).first()
     if not delivery:
         raise HTTPException(404, "Delivery not found")
@@ -31,39 +32,27 @@ async def generate_tracking_file(delivery_id: str):
         raise HTTPException(404, "Device not found")
 
     telemetry_list = (
-        session.query(Telemetry)
+        session.query(Telemetry.timestamp, Telemetry.latitude, Telemetry.longitude)
         .filter_by(device_id=device.id)
         .order_by(Telemetry.timestamp.asc())
         .all()
     )
 
-    if len(telemetry_list) < 2:
-        raise HTTPException(400, "Insufficient telemetry to generate tracking")
-
-    start = telemetry_list[0]
-    end = telemetry_list[-1]
-
-    start_coords = (start.latitude, start.longitude)
-    end_coords = (end.latitude, end.longitude)
-
-    tracking_points = [
-        [float(t.longitude), float(t.latitude)] for t in telemetry_list
-    ]
-
-    total_distance_km = 0.0
-    for i in range(len(telemetry_list) - 1):
-        p1 = telemetry_list[i]
-        p2 = telemetry_list[i + 1]
-        total_distance_km += geodesic(
-            (p1.latitude, p1.longitude),
-            (p2.latitude, p2.longitude)
-        ).km
+    # the distance sum is CPU-bound, keep it off the event loop
+    summary = await run_cpu(
+        summarize_track,
+        [tuple(t) for t in telemetry_list],
+        ENV.GPS_MAX_SPEED_KMH,
+        ENV.GPS_ACCURACY_METERS,
+    )
 
-    start_time = start.timestamp
-    end_time = end.timestamp
+    if summary is None:
+        raise HTTPException(400, "Insufficient telemetry to generate tracking")
 
-    duration_hours = (end_time - start_time).total_seconds() / 3600
-    speed_avg = total_distance_km / duration_hours if duration_hours > 0 else 0
+    start = summary["start"]
+    end = summary["end"]
+    total_distance_km = summary["distance_km"]
+    tracking_points = summary["tracking"]
 
     tracking_data = {
         "deliveryId": delivery.id,
@@ -72,10 +61,10 @@ async def generate_tracking_file(delivery_id: str):
         "validated": True,
         "start": {"lat": start.latitude, "lng": start.longitude},
         "end": {"lat": end.latitude, "lng": end.longitude},
-        "startTimestamp": start_time.isoformat(),
-        "endTimestamp": end_time.isoformat(),
+        "startTimestamp": start.timestamp.isoformat(),
+        "endTimestamp": end.timestamp.isoformat(),
         "distanceKm": round(total_distance_km, 2),
-        "speedAvgKmH": round(speed_avg, 2),
+        "speedAvgKmH": round(summary["speed_avg"], 2),
         "tracking": tracking_points
     }
 
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import Depends, APIRouter, HTTPException, Query
+from sqlmodel import Session
+
+from app.core.profiling import ProfiledRoute
+from app.core.database import get_session
+from app.services.trajectory_service import check_raw_window, position_at, query_box, query_radius
+from app.schemas.telemetry_schemas import TelemetryRead
+from app.schemas.trajectory_schemas import *
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+def _check_window(start: datetime, end: datetime):
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+
+
+@router.get("/near", response_model=List[DeviceProximity])
+def devices_near(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(..., gt=0, le=50000),
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    session: Session = Depends(get_session),
+):
+    """
+    Devices that reported a position within `radius_m` of (lat, lon) between `start` and `end`,
+    closest first. Only served within raw retention (TELEMETRY_RAW_RETENTION_DAYS), 410 before it.
+    """
+    _check_window(start, end)
+    check_raw_window(start)
+    return query_radius(session, lat, lon, radius_m, start, end)
+
+
+@router.get("/bbox", response_model=List[TelemetryRead])
+def points_in_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    device_id: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    session: Session = Depends(get_session),
+):
+    """
+    Telemetry points inside the box and time window, oldest first.
+    Only served within raw retention (TELEMETRY_RAW_RETENTION_DAYS), 410 before it.
+    """
+    _check_window(start, end)
+    check_raw_window(start)
+    if max_lat < min_lat or max_lon < min_lon:
+        raise HTTPException(status_code=400, detail="Empty bounding box")
+    return query_box(session, min_lat, min_lon, max_lat, max_lon, start, end, device_id, limit)
+
+
+@router.get("/position", response_model=PositionAt)
+def device_position(
+    device_id: str,
+    at: datetime,
+    max_gap_seconds: int = Query(600, gt=0, le=86400),
+    session: Session = Depends(get_session),
+):
+    """
+    Where a device was at `at`, interpolated between the points around it.
+    Points further than `max_gap_seconds` from `at` are not used. Past raw retention the
+    minute or hour rollups are used instead (`resolution` tells which, without before/after).
+    """
+    position = position_at(session, device_id, at, timedelta(seconds=max_gap_seconds))
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"No telemetry of {device_id} around {at.isoformat()}")
+    return position
@@ -2,13 +2,14 @@ from typing import List
 from fastapi import Depends, APIRouter
 from sqlmodel import select, Session
 
+from app.core.profiling import ProfiledRoute
 from app.core.database import get_session
 from app.utils.helpers import generate_id, get_or_404
 from app.models.user import *
 from app.schemas.user_schema import *
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("", response_model=UserRead, status_code=201)
@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel
+from typing import Optional, List
+
+
+class BulkRowError(SQLModel):
+    index: int
+    id: Optional[str] = None
+    errors: List[str]
+
+
+class BulkResult(SQLModel):
+    received: int
+    written: int
+    errors: List[BulkRowError]
@@ -64,3 +64,10 @@ class DeliveryUpdate(SQLModel):
 
     created_at: Optional[datetime] = None
     eta_minutes: Optional[int] = None
+
+
+class DeliveryEtaRead(SQLModel):
+    delivery_id: str
+    device_id: Optional[str] = None
+    status: Optional[str] = None
+    eta_minutes: Optional[int] = None
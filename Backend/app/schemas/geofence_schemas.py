@@ -0,0 +1,22 @@
+from sqlmodel import SQLModel
+from typing import Optional
+from datetime import datetime
+
+
+class GeofenceEventRead(SQLModel):
+    id: str
+    device_id: str
+    delivery_id: Optional[str] = None
+    type: str
+    timestamp: datetime
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    distance_m: Optional[float] = None
+    telemetry_id: Optional[str] = None
+
+
+class GeofenceSummary(SQLModel):
+    since: datetime
+    enter: int = 0
+    exit: int = 0
+    dwell: int = 0
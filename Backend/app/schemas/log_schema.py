@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 
@@ -23,3 +23,8 @@ class LogUpdate(SQLModel):
     message: Optional[str] = None
     timestamp: Optional[datetime] = None
     extra: Optional[Dict[str, Any]] = None
+
+
+class LogPage(SQLModel):
+    items: List[LogRead]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,16 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+
+
+class ProfilingSettings(SQLModel):
+    enabled: bool
+    sample_rate: float
+    threshold_ms: float
+    buffer_size: int
+
+
+class ProfilingSettingsUpdate(SQLModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    threshold_ms: Optional[float] = Field(default=None, ge=0)
+    buffer_size: Optional[int] = Field(default=None, ge=1, le=1000)
@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 
@@ -27,3 +27,30 @@ class TelemetryUpdate(SQLModel):
     speed: Optional[float] = None
     battery_level: Optional[int] = None
     timestamp: Optional[datetime] = None
+
+
+class TelemetrySeriesPoint(SQLModel):
+    timestamp: datetime
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    count: int
+    speed_min: Optional[float] = None
+    speed_max: Optional[float] = None
+    speed_avg: Optional[float] = None
+    battery_min: Optional[int] = None
+    battery_max: Optional[int] = None
+    battery_avg: Optional[float] = None
+
+
+class TelemetrySeries(SQLModel):
+    device_id: str
+    resolution: int
+    points: List[TelemetrySeriesPoint]
+
+
+class TelemetryFrameResult(SQLModel):
+    frames: int
+    received: int
+    written: int
+    duplicates: int
+    rejected: int
@@ -0,0 +1,25 @@
+from sqlmodel import SQLModel
+from typing import Optional
+from datetime import datetime
+
+from app.schemas.telemetry_schemas import TelemetryRead
+
+
+class DeviceProximity(SQLModel):
+    device_id: Optional[str] = None
+    first_seen: datetime
+    last_seen: datetime
+    points: int
+    min_distance_m: float
+    closest_at: datetime
+
+
+class PositionAt(SQLModel):
+    device_id: str
+    at: datetime
+    latitude: float
+    longitude: float
+    interpolated: bool
+    resolution: int = 0  # 0 for raw points, else the rollup bucket size in seconds
+    before: Optional[TelemetryRead] = None
+    after: Optional[TelemetryRead] = None
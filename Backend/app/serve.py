@@ -0,0 +1,33 @@
+"""
+Production entry point with several worker processes.
+
+    cd Backend
+    python -m app.serve --workers 4 --port 8000
+
+Workers share the SQLite database but not memory, so cache invalidations go over the
+event bus (EVENT_BUS_URL). Without one, workers on this host talk over unix sockets.
+"""
+import argparse
+import os
+import tempfile
+
+import uvicorn
+
+from app.core.config import ENV
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=ENV.WORKERS)
+    args = parser.parse_args()
+
+    if args.workers > 1 and ENV.EVENT_BUS_URL == "local://":
+        os.environ["EVENT_BUS_URL"] = f"unix://{tempfile.gettempdir()}/geolockbox-bus-{args.port}"
+
+    uvicorn.run("app.main:create_app", factory=True, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
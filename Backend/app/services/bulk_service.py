@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+from typing import Any, Dict, List, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import JSON, inspect, null
+from sqlalchemy.exc import OperationalError, StatementError
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, SQLModel
+
+from app.utils.helpers import generate_id
+
+# SQLite INTEGER is a signed 64 bit value
+INT_MIN, INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def parse_rows(body: bytes, content_type: str) -> List[Dict[str, Any]]:
+    """
+    Turns a bulk request body (JSON array or CSV with a header line) into a list of raw rows.
+    Empty CSV cells are left out of the row.
+    """
+    if "csv" in (content_type or ""):
+        try:
+            text = body.decode("utf-8-sig")
+        except UnicodeDecodeError as exc:
+            raise HTTPException(status_code=400, detail=f"CSV must be UTF-8 encoded (invalid byte at position {exc.start})")
+        reader = csv.DictReader(io.StringIO(text))
+        rows = []
+        try:
+            for record in reader:
+                row = {}
+                for key, value in record.items():
+                    if key is None or value is None or value.strip() == "":
+                        continue
+                    value = value.strip()
+                    # JSON columns (e.g. geofence) arrive as text in CSV files
+                    if value[0] in "{[":
+                        try:
+                            value = json.loads(value)
+                        except ValueError:
+                            pass
+                    row[key.strip()] = value
+                rows.append(row)
+        except csv.Error as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV at line {reader.line_num}: {exc}")
+        return rows
+
+    try:
+        rows = json.loads(body or b"[]")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+    return rows
+
+
+def validate_rows(
+    rows: List[Any], schema: Type[SQLModel], prefix: str
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """
+    Validates every row against the create schema in a single pass.
+    Returns the valid rows ready to be written, with their position in the request, and the
+    per-row errors. Only fields present in a row are kept, so an explicit null clears a field
+    on update while a missing one leaves it alone.
+    """
+    valid = []
+    errors = []
+    for index, raw in enumerate(rows):
+        if not isinstance(raw, dict):
+            errors.append({"index": index, "id": None, "errors": ["Row must be an object"]})
+            continue
+        try:
+            item = schema.model_validate(raw)
+        except ValidationError as exc:
+            errors.append({
+                "index": index,
+                "id": None if raw.get("id") is None else str(raw["id"]),
+                "errors": [f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in exc.errors()],
+            })
+            continue
+        data = item.model_dump(exclude_unset=True)
+        too_large = [
+            f"{field}: Integer out of range"
+            for field, value in data.items()
+            if isinstance(value, int) and not isinstance(value, bool) and not INT_MIN <= value <= INT_MAX
+        ]
+        if too_large:
+            errors.append({"index": index, "id": item.id, "errors": too_large})
+            continue
+        data["id"] = item.id or generate_id(prefix)
+        valid.append((index, data))
+    return valid, errors
+
+
+def _upsert_statements(model: Type[SQLModel], rows: List[Tuple[int, Dict[str, Any]]]):
+    """
+    One INSERT ... ON CONFLICT DO UPDATE per set of columns present, updating only those columns.
+    """
+    table = model.__table__
+    json_columns = {c.name for c in table.columns if isinstance(c.type, JSON)}
+    # the mapped key (id), which is not the table's primary key on tables with a seq rowid
+    pk = [c.name for c in inspect(model).primary_key]
+
+    groups: Dict[frozenset, List[Tuple[int, Dict[str, Any]]]] = {}
+    for index, row in rows:
+        # JSON columns would store None as the string 'null' instead of SQL NULL
+        params = {c: null() if v is None and c in json_columns else v for c, v in row.items()}
+        groups.setdefault(frozenset(params), []).append((index, params))
+
+    for columns, group in groups.items():
+        stmt = insert(table)
+        update = {c: stmt.excluded[c] for c in columns if c not in pk}
+        if update:
+            stmt = stmt.on_conflict_do_update(index_elements=pk, set_=update)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=pk)
+        yield stmt, group
+
+
+def bulk_upsert(
+    session: Session, model: Type[SQLModel], rows: List[Tuple[int, Dict[str, Any]]]
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Writes all rows in a single transaction, one executemany per set of columns present.
+    Columns missing from a row keep their stored value on update. Rows repeating an id are
+    merged in request order and written once. If the database rejects a row, the batch is
+    retried row by row and only the rejected rows are reported back.
+    """
+    if not rows:
+        return 0, []
+
+    merged: Dict[Any, Tuple[int, Dict[str, Any]]] = {}
+    for index, row in rows:
+        if row["id"] in merged:
+            first, earlier = merged[row["id"]]
+            row = {**earlier, **row}
+            index = first
+        merged[row["id"]] = (index, row)
+    rows = list(merged.values())
+
+    statements = list(_upsert_statements(model, rows))
+    try:
+        with session.begin_nested():
+            for stmt, group in statements:
+                session.execute(stmt, [params for _, params in group])
+        session.commit()
+        return len(rows), []
+    except StatementError as exc:
+        if isinstance(exc, OperationalError):
+            # locked or broken database, not a problem of any row
+            raise
+
+    written = 0
+    errors = []
+    for stmt, group in statements:
+        for index, params in group:
+            try:
+                with session.begin_nested():
+                    session.execute(stmt, params)
+                written += 1
+            except StatementError as exc:
+                if isinstance(exc, OperationalError):
+                    raise
+                reason = str(getattr(exc, "orig", None) or exc).splitlines()[0]
+                errors.append({"index": index, "id": params.get("id"), "errors": [reason]})
+    session.commit()
+    return written, errors
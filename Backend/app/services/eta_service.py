@@ -0,0 +1,173 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from math import ceil
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import bindparam, func, update
+from sqlmodel import Session, select
+
+from app.core.cache import LocalCache, MISSING
+from app.core.config import ENV
+from app.core.database import engine
+from app.core.events import bus
+from app.core.metrics import register_gauge
+from app.core.worker import PeriodicWorker
+from app.models.delivery import Delivery
+from app.models.device import Device
+from app.models.telemetry import Telemetry
+from app.services.lock_services import haversine_distance
+
+logger = logging.getLogger(__name__)
+
+IN_CHUNK = 500  # device ids per IN (...) list, well below SQLite's bound parameter limit
+
+
+class DeliveryEta(NamedTuple):
+    delivery_id: str
+    device_id: Optional[str]
+    status: Optional[str]
+    eta_minutes: Optional[int]
+
+
+def active_statuses() -> List[str]:
+    return [s.strip() for s in ENV.ETA_ACTIVE_STATUSES.split(",") if s.strip()]
+
+
+def _active_deliveries():
+    return select(Delivery.id, Delivery.device_id, Delivery.dest_lat, Delivery.dest_lon,
+                  Delivery.geofence_radius, Delivery.eta_minutes).where(
+        Delivery.status.in_(active_statuses()),
+        Delivery.device_id.is_not(None),
+    )
+
+
+def _device_profiles(session: Session, device_ids, since: datetime) -> Dict[str, tuple]:
+    """
+    Latest position and average reported speed in the window for every device, in one grouped query.
+    """
+    window = {"partition_by": Telemetry.device_id, "order_by": Telemetry.timestamp, "rows": (None, None)}
+    points = select(
+        Telemetry.device_id,
+        Telemetry.speed,
+        func.last_value(Telemetry.latitude).over(**window).label("last_lat"),
+        func.last_value(Telemetry.longitude).over(**window).label("last_lon"),
+    ).where(Telemetry.device_id.in_(device_ids), Telemetry.timestamp >= since).subquery()
+
+    rows = session.execute(
+        select(
+            points.c.device_id,
+            func.max(points.c.last_lat),
+            func.max(points.c.last_lon),
+            func.avg(points.c.speed),
+        ).group_by(points.c.device_id)
+    ).all()
+    return {r[0]: r[1:] for r in rows}
+
+
+def compute_etas(session: Session, deliveries, now: Optional[datetime] = None) -> Dict[str, Optional[int]]:
+    """
+    ETA in minutes for every given active delivery row: remaining straight-line distance times the
+    route factor, at the device's recent average speed. Only the devices of these rows are read;
+    positions come from the telemetry window, falling back to the device's last reported position.
+    """
+    now = now or datetime.now()
+    if not deliveries:
+        return {}
+
+    since = now - timedelta(minutes=ENV.ETA_SPEED_WINDOW_MINUTES)
+    device_ids = sorted({d[1] for d in deliveries if d[1] is not None})
+    profiles: Dict[str, tuple] = {}
+    positions = {}
+    for i in range(0, len(device_ids), IN_CHUNK):
+        chunk = device_ids[i:i + IN_CHUNK]
+        profiles.update(_device_profiles(session, chunk, since))
+        positions.update(
+            (r[0], (r[1], r[2]))
+            for r in session.execute(select(Device.id, Device.latitude, Device.longitude).where(Device.id.in_(chunk)))
+        )
+
+    default_speed = ENV.ETA_DEFAULT_SPEED_KMH
+    min_speed = ENV.ETA_MIN_SPEED_KMH
+    factor = ENV.ETA_ROUTE_FACTOR
+
+    # single pass over plain tuples; this runs for every active delivery each cycle
+    etas = {}
+    for delivery_id, device_id, dest_lat, dest_lon, radius, _ in deliveries:
+        profile = profiles.get(device_id)
+        if profile is not None:
+            lat, lon, speed = profile
+        else:
+            (lat, lon), speed = positions.get(device_id, (None, None)), None
+        if lat is None or lon is None or dest_lat is None or dest_lon is None:
+            etas[delivery_id] = None
+            continue
+
+        distance_m = haversine_distance(lat, lon, dest_lat, dest_lon)
+
+        if radius and distance_m <= radius:
+            etas[delivery_id] = 0
+            continue
+
+        speed_kmh = max(speed if speed is not None else default_speed, min_speed)
+        etas[delivery_id] = ceil(distance_m * factor / 1000 / speed_kmh * 60)
+    return etas
+
+
+last_run = {"timestamp": 0.0, "seconds": 0.0, "deliveries": 0, "updated": 0}
+
+
+def run_eta_cycle() -> int:
+    """
+    Recomputes all ETAs and writes back only the ones that changed, in one executemany UPDATE.
+    """
+    started = time.time()
+    with Session(engine) as session:
+        deliveries = session.execute(_active_deliveries()).all()
+        etas = compute_etas(session, deliveries)
+        changed = [
+            {"b_id": r.id, "b_eta": etas[r.id]}
+            for r in deliveries
+            if r.eta_minutes != etas[r.id]
+        ]
+        if changed:
+            session.execute(
+                update(Delivery.__table__)
+                .where(Delivery.__table__.c.id == bindparam("b_id"))
+                .values(eta_minutes=bindparam("b_eta")),
+                changed,
+            )
+            session.commit()
+
+    if changed:
+        eta_cache.invalidate()
+    last_run.update(timestamp=started, seconds=time.time() - started, deliveries=len(etas), updated=len(changed))
+    logger.debug("ETA cycle: %d active deliveries, %d updated", len(etas), len(changed))
+    return len(changed)
+
+
+# ---------- read side ----------
+# the snapshot is shared by every request until the next cycle changes something
+eta_cache = LocalCache("eta", ttl=ENV.ETA_INTERVAL_SECONDS)
+
+
+def get_etas(session: Session) -> Dict[str, DeliveryEta]:
+    snapshot = eta_cache.get("all")
+    if snapshot is not MISSING:
+        return snapshot
+
+    rows = session.execute(
+        select(Delivery.id, Delivery.device_id, Delivery.status, Delivery.eta_minutes)
+        .where(Delivery.status.in_(active_statuses()))
+    ).all()
+    snapshot = {r[0]: DeliveryEta(*r) for r in rows}
+    eta_cache.set("all", snapshot)
+    return snapshot
+
+
+bus.subscribe("delivery.changed", lambda payload: eta_cache.drop_local())
+
+eta_worker = PeriodicWorker("eta", ENV.ETA_INTERVAL_SECONDS, run_eta_cycle, lock="eta")
+register_gauge("geolockbox_eta_last_run_duration_seconds", "Duration of the last ETA cycle.", lambda: last_run["seconds"])
+register_gauge("geolockbox_eta_last_run_deliveries", "Active deliveries in the last ETA cycle.", lambda: last_run["deliveries"])
+register_gauge("geolockbox_eta_last_run_updated", "ETAs changed by the last ETA cycle.", lambda: last_run["updated"])
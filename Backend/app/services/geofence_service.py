@@ -0,0 +1,242 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+
+from app.core.config import ENV
+from app.core.events import Broadcaster, bus
+from app.core.metrics import register_gauge
+from app.models.geofence_event import GeofenceEvent
+from app.models.telemetry import Telemetry
+from app.services.lock_services import LockTarget, get_lock_target, haversine_distance
+from app.utils.helpers import generate_id
+
+ENTER = "enter"
+EXIT = "exit"
+DWELL = "dwell"
+
+
+def _local(ts: Optional[datetime]) -> datetime:
+    # stored timestamps are naive local time
+    if ts is None:
+        return datetime.now()
+    if ts.tzinfo is not None:
+        return ts.astimezone().replace(tzinfo=None)
+    return ts
+
+
+class ZoneState:
+    """
+    Where one device stands relative to its current delivery's geofence.
+    """
+
+    __slots__ = ("delivery_id", "inside", "entered_at", "dwell_sent", "last_ts", "pending")
+
+    def __init__(self, delivery_id: Optional[str]):
+        self.delivery_id = delivery_id
+        self.inside = False
+        self.entered_at: Optional[datetime] = None
+        self.dwell_sent = False
+        self.last_ts: Optional[datetime] = None
+        self.pending: Optional[tuple] = None  # (timestamp, latitude, longitude, distance) of an unconfirmed crossing
+
+    def apply(self, event_type: str, timestamp: datetime):
+        self.pending = None
+        if event_type == ENTER:
+            self.inside, self.entered_at, self.dwell_sent = True, timestamp, False
+        elif event_type == DWELL:
+            self.inside, self.dwell_sent = True, True
+        else:
+            self.inside, self.entered_at, self.dwell_sent = False, None, False
+
+
+class GeofenceDetector:
+    """
+    Turns the per-device point stream into enter/exit/dwell events. Each point costs one dict
+    lookup and one distance; the delivery's geofence comes from the lock target cache.
+    """
+
+    def __init__(self, hysteresis_m: float = 20.0, confirm_seconds: float = 10.0, dwell_seconds: float = 120.0):
+        self.hysteresis_m = hysteresis_m
+        self.confirm_seconds = confirm_seconds
+        self.dwell_seconds = dwell_seconds
+        self._states: Dict[str, ZoneState] = {}
+        self._lock = threading.Lock()
+
+    def evaluate(
+        self,
+        device_id: str,
+        target: Optional[LockTarget],
+        latitude: float,
+        longitude: float,
+        timestamp: datetime,
+        restore=None,
+    ) -> List[Dict[str, Any]]:
+        if target is None or target.dest_lat is None or target.dest_lon is None or not target.geofence_radius:
+            with self._lock:
+                self._states.pop(device_id, None)
+            return []
+
+        distance = haversine_distance(latitude, longitude, target.dest_lat, target.dest_lon)
+        events = []
+
+        state = self._states.get(device_id)
+        if state is None or state.delivery_id != target.delivery_id:
+            # first point of this delivery in this worker, the only time the database is read
+            fresh = restore(device_id, target.delivery_id) if restore else ZoneState(target.delivery_id)
+            with self._lock:
+                state = self._states.get(device_id)
+                if state is None or state.delivery_id != target.delivery_id:
+                    state = self._states[device_id] = fresh
+
+        with self._lock:
+            if state.last_ts is not None and timestamp < state.last_ts:
+                # late point, the state already moved past it
+                return []
+            state.last_ts = timestamp
+
+            # hysteresis: entering needs the radius, leaving needs the radius plus the band
+            if state.inside:
+                inside = distance <= target.geofence_radius + self.hysteresis_m
+            else:
+                inside = distance <= target.geofence_radius
+
+            if inside != state.inside:
+                if state.pending is None:
+                    state.pending = (timestamp, latitude, longitude, distance)
+                crossed_at, lat, lon, dist = state.pending
+                if (timestamp - crossed_at).total_seconds() >= self.confirm_seconds:
+                    event_type = ENTER if inside else EXIT
+                    state.apply(event_type, crossed_at)
+                    events.append(self._event(device_id, target.delivery_id, event_type, crossed_at, lat, lon, dist))
+            else:
+                state.pending = None
+
+            if state.inside and not state.dwell_sent and state.entered_at is not None \
+                    and (timestamp - state.entered_at).total_seconds() >= self.dwell_seconds:
+                state.apply(DWELL, timestamp)
+                events.append(self._event(device_id, target.delivery_id, DWELL, timestamp, latitude, longitude, distance))
+
+        return events
+
+    @staticmethod
+    def _event(device_id, delivery_id, event_type, timestamp, latitude, longitude, distance) -> Dict[str, Any]:
+        return {
+            "id": generate_id("GFE", key=f"{device_id}|{delivery_id}|{event_type}|{timestamp.isoformat()}", at=timestamp),
+            "device_id": device_id,
+            "delivery_id": delivery_id,
+            "type": event_type,
+            "timestamp": timestamp,
+            "latitude": latitude,
+            "longitude": longitude,
+            "distance_m": round(distance, 1),
+        }
+
+    def apply_remote(self, event: Dict[str, Any]):
+        """
+        Keeps this worker's state in line with an event detected by another worker.
+        """
+        with self._lock:
+            state = self._states.get(event["device_id"])
+            if state is None or state.delivery_id != event["delivery_id"]:
+                return
+            # also called for this worker's own events, which are already applied
+            event_type = event["type"]
+            if (event_type == ENTER and state.inside) or (event_type == EXIT and not state.inside) \
+                    or (event_type == DWELL and state.dwell_sent):
+                return
+            state.apply(event_type, datetime.fromisoformat(event["timestamp"]))
+
+    def forget(self, device_id: str):
+        with self._lock:
+            self._states.pop(device_id, None)
+
+    def tracked_devices(self) -> int:
+        return len(self._states)
+
+
+def restore_state(session: Session, device_id: str, delivery_id: Optional[str]) -> ZoneState:
+    """
+    Rebuilds a device's state from its last stored event, so a restart doesn't repeat an `enter`.
+    """
+    last = session.exec(
+        select(GeofenceEvent)
+        .where(GeofenceEvent.device_id == device_id, GeofenceEvent.delivery_id == delivery_id)
+        .order_by(GeofenceEvent.timestamp.desc())
+        .limit(1)
+    ).first()
+    state = ZoneState(delivery_id)
+    if last is not None:
+        state.apply(last.type, last.timestamp)
+    return state
+
+
+def evaluate_point(
+    session: Session, device_id: str, latitude: float, longitude: float, timestamp: Optional[datetime]
+) -> List[Dict[str, Any]]:
+    """
+    Runs one point through the detector without storing anything.
+    """
+    target = get_lock_target(session, device_id)
+    return geofence_detector.evaluate(
+        device_id,
+        target,
+        latitude,
+        longitude,
+        _local(timestamp),
+        restore=lambda device_id, delivery_id: restore_state(session, device_id, delivery_id),
+    )
+
+
+def store_events(session: Session, events: List[Dict[str, Any]]):
+    """
+    Stores detected events and announces them to every worker.
+    """
+    if not events:
+        return
+    session.execute(insert(GeofenceEvent.__table__).on_conflict_do_nothing(index_elements=["id"]), events)
+    session.commit()
+
+    for event in events:
+        bus.publish("geofence.event", {**event, "timestamp": event["timestamp"].isoformat()})
+
+
+def detect_events(session: Session, telemetry: Telemetry) -> List[Dict[str, Any]]:
+    """
+    Runs a stored telemetry point through the detector, stores the resulting events and
+    announces them to every worker.
+    """
+    if telemetry.device_id is None or telemetry.latitude is None or telemetry.longitude is None:
+        return []
+
+    events = evaluate_point(session, telemetry.device_id, telemetry.latitude, telemetry.longitude, telemetry.timestamp)
+    for event in events:
+        event["telemetry_id"] = telemetry.id
+    store_events(session, events)
+    return events
+
+
+geofence_detector = GeofenceDetector(
+    hysteresis_m=ENV.GEOFENCE_HYSTERESIS_METERS,
+    confirm_seconds=ENV.GEOFENCE_CONFIRM_SECONDS,
+    dwell_seconds=ENV.GEOFENCE_DWELL_SECONDS,
+)
+geofence_stream = Broadcaster()
+
+
+def _on_event(payload):
+    geofence_detector.apply_remote(payload)
+    geofence_stream.publish(payload)
+
+
+def _on_device_changed(payload):
+    if payload["op"] == "delete":
+        geofence_detector.forget(payload["id"])
+
+
+bus.subscribe("geofence.event", _on_event)
+bus.subscribe("device.changed", _on_device_changed)
+register_gauge("geolockbox_geofence_tracked_devices", "Devices with geofence state in memory.", geofence_detector.tracked_devices)
+register_gauge("geolockbox_geofence_stream_clients", "Clients connected to the geofence event stream.", lambda: len(geofence_stream))
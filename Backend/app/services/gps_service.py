@@ -0,0 +1,343 @@
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from app.core.config import ENV
+from app.core.events import bus
+from app.core.metrics import register_gauge
+from app.services.lock_services import haversine_distance
+
+ACCEPTED = "accepted"
+DUPLICATE = "duplicate"
+LATE = "late"
+OUTLIER = "outlier"
+INVALID = "invalid"
+
+# after this many distinct outliers in a row that agree with each other,
+# the device is assumed to really be somewhere else
+RESET_AFTER_REJECTS = 3
+
+
+class GpsPoint(NamedTuple):
+    timestamp: datetime
+    latitude: float
+    longitude: float
+
+
+class FilterResult(NamedTuple):
+    status: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    key: Optional[str] = None
+    telemetry_id: Optional[str] = None
+
+
+def _naive(ts: Optional[datetime]) -> datetime:
+    if ts is None:
+        return datetime.now()
+    if ts.tzinfo is not None:
+        return ts.astimezone().replace(tzinfo=None)
+    return ts
+
+
+class KalmanState:
+    """
+    Constant-position Kalman filter on lat/lon with a single variance in metres^2.
+    Uncertainty grows with elapsed time at `q_mps` and every fix has `accuracy_m` error.
+    """
+
+    __slots__ = ("latitude", "longitude", "variance", "timestamp")
+
+    def __init__(self, point: GpsPoint, accuracy_m: float):
+        self.latitude = point.latitude
+        self.longitude = point.longitude
+        self.variance = accuracy_m * accuracy_m
+        self.timestamp = point.timestamp
+
+    def update(self, point: GpsPoint, accuracy_m: float, q_mps: float) -> GpsPoint:
+        dt = (point.timestamp - self.timestamp).total_seconds()
+        if dt > 0:
+            self.variance += dt * q_mps * q_mps
+            self.timestamp = point.timestamp
+
+        gain = self.variance / (self.variance + accuracy_m * accuracy_m)
+        self.latitude += gain * (point.latitude - self.latitude)
+        self.longitude += gain * (point.longitude - self.longitude)
+        self.variance *= 1 - gain
+        return GpsPoint(point.timestamp, self.latitude, self.longitude)
+
+
+class DeviceTrack:
+    """
+    Bounded per-device state: the last `dedupe_size` keys, the last `reorder_size` accepted points
+    and the outliers rejected since the last accepted point.
+    """
+
+    __slots__ = ("keys", "window", "rejects", "kalman")
+
+    def __init__(self):
+        # key -> stored telemetry id, or OUTLIER for a rejected point
+        self.keys: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self.window: List[GpsPoint] = []
+        self.rejects: List[GpsPoint] = []
+        self.kalman: Optional[KalmanState] = None
+
+    def remember(self, key: str, value: Optional[str], limit: int):
+        self.keys[key] = value
+        if len(self.keys) > limit:
+            self.keys.popitem(last=False)
+
+
+class GpsFilter:
+    """
+    Ingest-side cleaning stage for GPS points: idempotency-key dedupe, bounded reordering
+    by timestamp, speed-plausibility outlier rejection and optional Kalman smoothing.
+    State is kept per device. With several workers a device's points land on any of them, so
+    every change is handed to `publish` and the other workers take the track over (apply_remote).
+    """
+
+    def __init__(
+        self,
+        max_speed_kmh: float = 180.0,
+        reorder_size: int = 5,
+        dedupe_size: int = 32,
+        accuracy_m: float = 10.0,
+        smoothing: bool = False,
+        q_mps: float = 3.0,
+    ):
+        self.max_speed_mps = max_speed_kmh / 3.6
+        self.reorder_size = reorder_size
+        self.dedupe_size = dedupe_size
+        self.accuracy_m = accuracy_m
+        self.smoothing = smoothing
+        self.q_mps = q_mps
+        self._tracks: Dict[str, DeviceTrack] = {}
+        self._lock = threading.Lock()
+        self.publish: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def _plausible(self, a: GpsPoint, b: GpsPoint) -> bool:
+        dt = max(abs((b.timestamp - a.timestamp).total_seconds()), 1.0)
+        # ignore jitter within the receiver's accuracy, mostly matters for stopped boxes
+        distance = haversine_distance(a.latitude, a.longitude, b.latitude, b.longitude) - 2 * self.accuracy_m
+        return distance / dt <= self.max_speed_mps
+
+    def process(
+        self,
+        device_id: str,
+        latitude: Optional[float],
+        longitude: Optional[float],
+        timestamp: Optional[datetime],
+        key: Optional[str] = None,
+    ) -> FilterResult:
+        result = self._process(device_id, latitude, longitude, timestamp, key)
+        if result.status == OUTLIER:
+            # accepted points are shared once they are stored, in bind()
+            self.share(device_id)
+        return result
+
+    def _process(
+        self,
+        device_id: str,
+        latitude: Optional[float],
+        longitude: Optional[float],
+        timestamp: Optional[datetime],
+        key: Optional[str],
+    ) -> FilterResult:
+        if latitude is None or longitude is None:
+            return FilterResult(INVALID)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or (latitude == 0 and longitude == 0):
+            return FilterResult(INVALID)
+
+        point = GpsPoint(_naive(timestamp), latitude, longitude)
+        key = key or f"{point.timestamp.isoformat()}|{latitude:.6f}|{longitude:.6f}"
+
+        with self._lock:
+            track = self._tracks.get(device_id)
+            if track is None:
+                track = self._tracks[device_id] = DeviceTrack()
+
+            if key in track.keys:
+                if track.keys[key] == OUTLIER:
+                    # a retry of a rejected point gets the same answer and doesn't count again
+                    return FilterResult(OUTLIER, latitude, longitude, key)
+                return FilterResult(DUPLICATE, latitude, longitude, key, track.keys[key])
+
+            window = track.window
+            times = [p.timestamp for p in window]
+            idx = bisect_right(times, point.timestamp)
+            if idx == 0 and len(window) >= self.reorder_size:
+                return FilterResult(LATE, latitude, longitude, key)
+
+            prev = window[idx - 1] if idx > 0 else None
+            nxt = window[idx] if idx < len(window) else None
+            newest = nxt is None
+
+            if (prev and not self._plausible(prev, point)) or (nxt and not self._plausible(point, nxt)):
+                anchor = self._new_anchor(track.rejects, point) if newest else None
+                if anchor is None:
+                    track.rejects.append(point)
+                    del track.rejects[:-RESET_AFTER_REJECTS]
+                    track.remember(key, OUTLIER, self.dedupe_size)
+                    return FilterResult(OUTLIER, latitude, longitude, key)
+                # the previous anchor was the bad one, start over from the agreeing points
+                window[:] = anchor[:-1]
+                track.kalman = None
+                idx = len(window)
+
+            track.rejects.clear()
+            window.insert(idx, point)
+            del window[:-self.reorder_size]
+
+            track.remember(key, None, self.dedupe_size)
+
+            # out-of-order points are stored as-is, smoothing only follows the head of the track
+            if self.smoothing and newest:
+                if track.kalman is None:
+                    track.kalman = KalmanState(point, self.accuracy_m)
+                else:
+                    smoothed = track.kalman.update(point, self.accuracy_m, self.q_mps)
+                    latitude, longitude = smoothed.latitude, smoothed.longitude
+
+            return FilterResult(ACCEPTED, latitude, longitude, key)
+
+    def _new_anchor(self, rejects: List[GpsPoint], point: GpsPoint) -> Optional[List[GpsPoint]]:
+        """
+        The last rejected points plus `point` when there are enough of them and they form a
+        plausible track on their own, None otherwise.
+        """
+        if len(rejects) < RESET_AFTER_REJECTS - 1:
+            return None
+        chain = sorted(rejects[-(RESET_AFTER_REJECTS - 1):] + [point])
+        if chain[-1] is not point:
+            return None
+        if all(self._plausible(a, b) for a, b in zip(chain, chain[1:])):
+            return chain
+        return None
+
+    def forget(self, device_id: str):
+        with self._lock:
+            self._tracks.pop(device_id, None)
+
+    def tracked_devices(self) -> int:
+        return len(self._tracks)
+
+    def discard(self, device_id: str, key: str, latitude: float, longitude: float, timestamp: Optional[datetime]):
+        """
+        Takes back an accepted point whose row could not be stored, so a retry is processed again
+        instead of being answered as a duplicate.
+        """
+        point = GpsPoint(_naive(timestamp), latitude, longitude)
+        with self._lock:
+            track = self._tracks.get(device_id)
+            if track is None:
+                return
+            track.keys.pop(key, None)
+            if point in track.window:
+                if track.window[-1] == point:
+                    # the smoothing state already moved to this point
+                    track.kalman = None
+                track.window.remove(point)
+
+    def bind(self, device_id: str, key: str, telemetry_id: str, share: bool = True):
+        """
+        Links an accepted key to the stored row so a retry gets the same row back.
+        With `share=False` the caller shares the track itself after binding several keys.
+        """
+        with self._lock:
+            track = self._tracks.get(device_id)
+            if track is not None and key in track.keys:
+                track.keys[key] = telemetry_id
+        if share:
+            self.share(device_id)
+
+    def share(self, device_id: str):
+        """
+        Sends the device's whole track to the other workers. It is a few points and keys, and
+        replacing it there keeps each device filtered against one state whichever worker gets its points.
+        """
+        if self.publish is None:
+            return
+        with self._lock:
+            track = self._tracks.get(device_id)
+            if track is None:
+                return
+            kalman = track.kalman
+            snapshot = {
+                "device_id": device_id,
+                "window": [[p.timestamp.isoformat(), p.latitude, p.longitude] for p in track.window],
+                "rejects": [[p.timestamp.isoformat(), p.latitude, p.longitude] for p in track.rejects],
+                "keys": list(track.keys.items()),
+                "kalman": None if kalman is None else
+                [kalman.timestamp.isoformat(), kalman.latitude, kalman.longitude, kalman.variance],
+            }
+        self.publish(snapshot)
+
+    def apply_remote(self, snapshot: Dict[str, Any]):
+        """
+        Takes over a track shared by another worker.
+        """
+        track = DeviceTrack()
+        track.window = [GpsPoint(datetime.fromisoformat(t), lat, lon) for t, lat, lon in snapshot["window"]]
+        track.rejects = [GpsPoint(datetime.fromisoformat(t), lat, lon) for t, lat, lon in snapshot["rejects"]]
+        track.keys = OrderedDict((key, value) for key, value in snapshot["keys"])
+        if snapshot["kalman"] is not None:
+            t, lat, lon, variance = snapshot["kalman"]
+            track.kalman = KalmanState(GpsPoint(datetime.fromisoformat(t), lat, lon), self.accuracy_m)
+            track.kalman.variance = variance
+        with self._lock:
+            self._tracks[snapshot["device_id"]] = track
+
+    def is_plausible(self, device_id: str, latitude: float, longitude: float, timestamp: Optional[datetime] = None) -> bool:
+        """
+        Read-only check of a position against the device's newest accepted point.
+        """
+        with self._lock:
+            track = self._tracks.get(device_id)
+            if track is None or not track.window:
+                return True
+            last = track.window[-1]
+        return self._plausible(last, GpsPoint(_naive(timestamp), latitude, longitude))
+
+
+def clean_track(points: List[GpsPoint], **options) -> List[GpsPoint]:
+    """
+    Runs an already stored, time-ordered track through a fresh filter and keeps the accepted points.
+    """
+    gps = GpsFilter(**options)
+    cleaned = []
+    for p in points:
+        result = gps.process("", p.latitude, p.longitude, p.timestamp)
+        if result.status == ACCEPTED:
+            cleaned.append(GpsPoint(p.timestamp, result.latitude, result.longitude))
+    return cleaned
+
+
+gps_filter = GpsFilter(
+    max_speed_kmh=ENV.GPS_MAX_SPEED_KMH,
+    reorder_size=ENV.GPS_REORDER_WINDOW,
+    dedupe_size=ENV.GPS_DEDUPE_WINDOW,
+    accuracy_m=ENV.GPS_ACCURACY_METERS,
+    smoothing=ENV.GPS_KALMAN_ENABLED,
+    q_mps=ENV.GPS_KALMAN_Q_METERS_PER_SECOND,
+)
+register_gauge("geolockbox_gps_filter_tracked_devices", "Devices with GPS filter state in memory.", gps_filter.tracked_devices)
+
+
+def _on_device_changed(payload):
+    if payload["op"] == "delete":
+        gps_filter.forget(payload["id"])
+
+
+def _on_track(payload):
+    # the publishing worker's own handlers are called too
+    if payload.pop("origin", None) != bus.origin:
+        gps_filter.apply_remote(payload)
+
+
+if ENV.EVENT_BUS_URL != "local://":
+    gps_filter.publish = lambda snapshot: bus.publish("gps.track", {**snapshot, "origin": bus.origin})
+
+bus.subscribe("device.changed", _on_device_changed)
+bus.subscribe("gps.track", _on_track)
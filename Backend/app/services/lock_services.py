@@ -1,4 +1,11 @@
 from math import radians, sin, cos, sqrt, atan2
+from typing import NamedTuple, Optional
+
+from sqlmodel import Session, select
+
+from app.core.cache import LocalCache, MISSING
+from app.core.events import bus
+from app.models.delivery import Delivery
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371000  # raio da terra em metros
@@ -7,7 +14,7 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     d_lon = radians(lon2 - lon1)
 
     a = sin(d_lat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(d_lon/2)**2
-    c =  atan2(sqrt(a), sqrt(1 - a))
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
 
     return R * c
 
@@ -29,3 +36,31 @@ def is_in_geofence(device, delivery):
     )
 
     return distance <= delivery.geofence_radius
+
+
+class LockTarget(NamedTuple):
+    delivery_id: str
+    dest_lat: Optional[float]
+    dest_lon: Optional[float]
+    geofence_radius: Optional[float]
+
+
+# every box polls /lock every few seconds, but its delivery rarely changes
+lock_target_cache = LocalCache("lock_target", ttl=30)
+
+
+def get_lock_target(session: Session, device_id: str) -> Optional[LockTarget]:
+    target = lock_target_cache.get(device_id)
+    if target is not MISSING:
+        return target
+
+    delivery = session.exec(
+        select(Delivery).where(Delivery.device_id == device_id)
+    ).first()
+    target = LockTarget(delivery.id, delivery.dest_lat, delivery.dest_lon, delivery.geofence_radius) if delivery else None
+    lock_target_cache.set(device_id, target)
+    return target
+
+
+# a delivery change can move a box between deliveries; the event already reached every worker
+bus.subscribe("delivery.changed", lambda payload: lock_target_cache.drop_local())
@@ -0,0 +1,139 @@
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, column, or_, table, text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from app.models.log import Log
+
+logger = logging.getLogger(__name__)
+
+# external-content FTS5 index over log.message keyed by log.seq, kept in sync by triggers
+_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5(message, content='log', content_rowid='seq')",
+    """CREATE TRIGGER IF NOT EXISTS log_fts_insert AFTER INSERT ON log BEGIN
+        INSERT INTO log_fts(rowid, message) VALUES (new.seq, new.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS log_fts_delete AFTER DELETE ON log BEGIN
+        INSERT INTO log_fts(log_fts, rowid, message) VALUES ('delete', old.seq, old.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS log_fts_update AFTER UPDATE OF message ON log BEGIN
+        INSERT INTO log_fts(log_fts, rowid, message) VALUES ('delete', old.seq, old.message);
+        INSERT INTO log_fts(rowid, message) VALUES (new.seq, new.message);
+    END""",
+]
+
+_log_fts = table("log_fts", column("rowid"))
+_fts_available = False
+
+
+def ensure_log_search(engine) -> bool:
+    """
+    Creates the full-text index, also on databases made before it existed.
+    Returns False when SQLite was built without FTS5; search then falls back to LIKE.
+    """
+    global _fts_available
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        existing = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'log_fts'").scalar()
+        if existing is not None and "content_rowid='seq'" not in existing:
+            # made when the index pointed at the implicit rowid, which VACUUM may renumber
+            for name in ("log_fts_insert", "log_fts_delete", "log_fts_update"):
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            conn.exec_driver_sql("DROP TABLE log_fts")
+            existing = None
+        existed = existing is not None
+        try:
+            for ddl in _FTS_DDL:
+                conn.exec_driver_sql(ddl)
+        except OperationalError as exc:
+            logger.warning("Full-text log search unavailable: %s", exc)
+            return False
+        if not existed:
+            # index the rows written before the triggers were there
+            conn.exec_driver_sql("INSERT INTO log_fts(log_fts) VALUES ('rebuild')")
+    _fts_available = True
+    return True
+
+
+def fts_query(q: str) -> str:
+    """
+    Turns free text into an FTS5 query: every word must match, `word*` is a prefix search.
+    Quoting each word keeps FTS5 operators and punctuation in user input from breaking the query.
+    """
+    terms = []
+    for word in q.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+def encode_cursor(log: Log) -> str:
+    return f"{log.timestamp.isoformat() if log.timestamp else ''}|{log.id}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    ts, _, log_id = cursor.partition("|")
+    try:
+        return (datetime.fromisoformat(ts) if ts else None), log_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def search_logs(
+    session: Session,
+    q: Optional[str] = None,
+    levels: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Tuple[List[Log], Optional[str]]:
+    """
+    Newest first, paginated by (timestamp, id) keyset so deep pages cost the same as the first.
+    Logs without a timestamp come last.
+    """
+    stmt = select(Log)
+
+    if q:
+        match = fts_query(q)
+        if not match:
+            return [], None
+        if _fts_available:
+            stmt = stmt.join(_log_fts, _log_fts.c.rowid == Log.seq).where(
+                text("log_fts MATCH :match").bindparams(match=match)
+            )
+        else:
+            for word in q.split():
+                stmt = stmt.where(Log.message.contains(word.rstrip("*"), autoescape=True))
+
+    if levels:
+        # the handler writes "INFO", clients posting logs may have used "info"
+        stmt = stmt.where(Log.level.in_({v for lvl in levels for v in (lvl, lvl.upper(), lvl.lower())}))
+    if start:
+        stmt = stmt.where(Log.timestamp >= start)
+    if end:
+        stmt = stmt.where(Log.timestamp < end)
+
+    if cursor:
+        ts, log_id = _decode_cursor(cursor)
+        if ts is None:
+            stmt = stmt.where(Log.timestamp.is_(None), Log.id < log_id)
+        else:
+            stmt = stmt.where(or_(
+                Log.timestamp < ts,
+                and_(Log.timestamp == ts, Log.id < log_id),
+                Log.timestamp.is_(None),
+            ))
+
+    stmt = stmt.order_by(Log.timestamp.desc(), Log.id.desc()).limit(limit + 1)
+    rows = session.exec(stmt).all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,330 @@
+import calendar
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, case, cast, delete, func, or_
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+
+from app.core.config import ENV
+from app.core.database import engine
+from app.core.metrics import register_gauge
+from app.core.worker import PeriodicWorker
+from app.models.telemetry import Telemetry
+from app.models.retention_state import RetentionState
+from app.models.telemetry_rollup import TelemetryRollup
+
+logger = logging.getLogger(__name__)
+
+RAW = 0
+MINUTE = 60
+HOUR = 3600
+
+
+@dataclass(frozen=True)
+class RetentionTier:
+    resolution: int  # bucket size in seconds, 0 for raw points
+    keep_days: Optional[int]  # None keeps the tier forever
+    max_span_days: Optional[int]  # longest query range still served from this tier
+
+
+def get_tiers() -> List[RetentionTier]:
+    return [
+        RetentionTier(RAW, ENV.TELEMETRY_RAW_RETENTION_DAYS, 1),
+        RetentionTier(MINUTE, ENV.TELEMETRY_MINUTE_RETENTION_DAYS, 31),
+        RetentionTier(HOUR, None, None),
+    ]
+
+
+def _epoch(column):
+    return cast(func.strftime("%s", column), Integer)
+
+
+def _from_epoch(value: int) -> datetime:
+    # timestamps are stored as naive local time; strftime('%s') reads them as UTC, so undo it the same way
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+# seq of the last raw point merged into the rollups. Points are picked up by insert order,
+# not by their timestamp, so late uploads and boxes with a wrong clock are rolled up too.
+# seq is AUTOINCREMENT, so a value is never handed out again after the newest row is pruned.
+CURSOR = "telemetry_rollup_seq"
+
+
+def _get_cursor(session: Session) -> Optional[int]:
+    state = session.get(RetentionState, CURSOR)
+    return state.value if state else None
+
+
+def _set_cursor(session: Session, value: int):
+    session.merge(RetentionState(name=CURSOR, value=value))
+
+
+def _aggregate_raw(session: Session, resolution: int, after: int, upto: int, since: Optional[datetime] = None):
+    """
+    Per device and `resolution`-second bucket aggregates of the raw points with after < seq <= upto.
+    """
+    bucket = (_epoch(Telemetry.timestamp) // resolution).label("bucket")
+    window = {
+        "partition_by": [Telemetry.device_id, bucket],
+        "order_by": Telemetry.timestamp,
+        "rows": (None, None),
+    }
+    points = select(
+        Telemetry.device_id,
+        bucket,
+        Telemetry.timestamp,
+        Telemetry.speed,
+        Telemetry.battery_level,
+        func.last_value(Telemetry.latitude).over(**window).label("last_lat"),
+        func.last_value(Telemetry.longitude).over(**window).label("last_lon"),
+    ).where(
+        Telemetry.seq > after,
+        Telemetry.seq <= upto,
+        Telemetry.device_id.is_not(None),
+        Telemetry.timestamp.is_not(None),
+    )
+    if since is not None:
+        points = points.where(Telemetry.timestamp >= since)
+    points = points.subquery()
+
+    return session.execute(
+        select(
+            points.c.device_id,
+            points.c.bucket,
+            func.count().label("count"),
+            func.max(points.c.last_lat).label("latitude"),
+            func.max(points.c.last_lon).label("longitude"),
+            func.max(points.c.timestamp).label("last_timestamp"),
+            func.min(points.c.speed).label("speed_min"),
+            func.max(points.c.speed).label("speed_max"),
+            func.avg(points.c.speed).label("speed_avg"),
+            func.min(points.c.battery_level).label("battery_min"),
+            func.max(points.c.battery_level).label("battery_max"),
+            func.avg(points.c.battery_level).label("battery_avg"),
+        ).group_by(points.c.device_id, points.c.bucket)
+    ).all()
+
+
+def _merge_rollups(session: Session, resolution: int, rows) -> int:
+    """
+    Adds aggregates to the stored buckets: counts add up, min/max widen, averages are weighted
+    by count and the position is the one with the newest timestamp.
+    """
+    values = []
+    for r in rows:
+        values.append({
+            "id": f"{r.device_id}|{resolution}|{r.bucket * resolution}",
+            "device_id": r.device_id,
+            "resolution": resolution,
+            "bucket_start": _from_epoch(r.bucket * resolution),
+            "count": r.count,
+            "latitude": r.latitude,
+            "longitude": r.longitude,
+            "last_timestamp": r.last_timestamp,
+            "speed_min": r.speed_min,
+            "speed_max": r.speed_max,
+            "speed_avg": r.speed_avg,
+            "battery_min": r.battery_min,
+            "battery_max": r.battery_max,
+            "battery_avg": r.battery_avg,
+        })
+    if not values:
+        return 0
+
+    table = TelemetryRollup.__table__
+    stmt = insert(table)
+    old, new = table.c, stmt.excluded
+    newer = or_(old.last_timestamp.is_(None), new.last_timestamp >= old.last_timestamp)
+
+    def widen(fn, column):
+        # SQLite's two-argument min()/max() return NULL if either side is NULL
+        return func.coalesce(fn(old[column], new[column]), old[column], new[column])
+
+    def weighted(column):
+        weight = case((old[column].is_not(None), old.count), else_=0) + case((new[column].is_not(None), new.count), else_=0)
+        total = func.coalesce(old[column] * old.count, 0) + func.coalesce(new[column] * new.count, 0)
+        return total / func.nullif(weight, 0)
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            "count": old.count + new.count,
+            "latitude": case((newer, new.latitude), else_=old.latitude),
+            "longitude": case((newer, new.longitude), else_=old.longitude),
+            "last_timestamp": widen(func.max, "last_timestamp"),
+            "speed_min": widen(func.min, "speed_min"),
+            "speed_max": widen(func.max, "speed_max"),
+            "speed_avg": weighted("speed_avg"),
+            "battery_min": widen(func.min, "battery_min"),
+            "battery_max": widen(func.max, "battery_max"),
+            "battery_avg": weighted("battery_avg"),
+        },
+    )
+    session.execute(stmt, values)
+    return len(values)
+
+
+def _rebuild_from_raw(session: Session, upto: int) -> Dict[int, int]:
+    """
+    One-off switch from an older cursor (timestamp watermarks, then rowids): every bucket that lies
+    completely within the raw points still stored is rebuilt from them. Older buckets are kept as they are.
+    """
+    oldest = session.exec(select(func.min(Telemetry.timestamp))).one()
+    written = {MINUTE: 0, HOUR: 0}
+    if oldest is None:
+        return written
+    for resolution in written:
+        start = _from_epoch(-(-calendar.timegm(oldest.timetuple()) // resolution) * resolution)
+        session.execute(delete(TelemetryRollup).where(
+            TelemetryRollup.resolution == resolution, TelemetryRollup.bucket_start >= start
+        ))
+        written[resolution] = _merge_rollups(session, resolution, _aggregate_raw(session, resolution, 0, upto, since=start))
+    return written
+
+
+def rollup(session: Session) -> Dict[int, int]:
+    """
+    Merges the raw points inserted since the last run into the minute and hour tiers.
+    Returns the number of buckets written per tier.
+    """
+    upto = session.exec(select(func.max(Telemetry.seq))).one() or 0
+    after = _get_cursor(session)
+    if after is None and session.exec(select(TelemetryRollup.id).limit(1)).first() is not None:
+        written = _rebuild_from_raw(session, upto)
+    elif upto <= (after or 0):
+        return {MINUTE: 0, HOUR: 0}
+    else:
+        written = {
+            resolution: _merge_rollups(session, resolution, _aggregate_raw(session, resolution, after or 0, upto))
+            for resolution in (MINUTE, HOUR)
+        }
+    _set_cursor(session, upto)
+    return written
+
+
+def prune(session: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Deletes data past its tier's retention, but never raw points the rollups have not absorbed yet.
+    Both rollup tiers are fed from the raw points, so minute buckets can go as soon as they expire.
+    """
+    now = now or datetime.now()
+    absorbed = _get_cursor(session) or 0
+    deleted = {}
+
+    for tier in get_tiers():
+        if tier.keep_days is None:
+            continue
+        cutoff = now - timedelta(days=tier.keep_days)
+        if tier.resolution == RAW:
+            stmt = delete(Telemetry).where(Telemetry.timestamp < cutoff, Telemetry.seq <= absorbed)
+        else:
+            stmt = delete(TelemetryRollup).where(
+                TelemetryRollup.resolution == tier.resolution,
+                TelemetryRollup.bucket_start < cutoff,
+            )
+        deleted[tier.resolution] = session.execute(stmt).rowcount
+
+    return deleted
+
+
+last_run = {"timestamp": 0.0, "seconds": 0.0}
+
+
+def run_retention() -> None:
+    started = time.time()
+    with Session(engine) as session:
+        written = rollup(session)
+        deleted = prune(session)
+        session.commit()
+    last_run["timestamp"] = started
+    last_run["seconds"] = time.time() - started
+    logger.info("Telemetry retention: %d minute / %d hour buckets written, deleted %s", written[MINUTE], written[HOUR], deleted)
+
+
+def raw_horizon(now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Start of the period raw points are still kept for; older ones only exist as rollups.
+    None when nothing is pruned.
+    """
+    keep_days = get_tiers()[0].keep_days
+    if not ENV.TELEMETRY_RETENTION_ENABLED or keep_days is None:
+        return None
+    return (now or datetime.now()) - timedelta(days=keep_days)
+
+
+def pick_resolution(start: datetime, end: datetime, now: Optional[datetime] = None) -> int:
+    """
+    Finest tier that still holds data for `start` and whose span limit covers the requested range.
+    """
+    now = now or datetime.now()
+    span = end - start
+    for tier in get_tiers():
+        if tier.keep_days is not None and start < now - timedelta(days=tier.keep_days):
+            continue
+        if tier.max_span_days is not None and span > timedelta(days=tier.max_span_days):
+            continue
+        return tier.resolution
+    return HOUR
+
+
+def query_series(
+    session: Session, device_id: str, start: datetime, end: datetime, resolution: int
+) -> List[Dict[str, Any]]:
+    if resolution == RAW:
+        rows = session.exec(
+            select(Telemetry)
+            .where(Telemetry.device_id == device_id, Telemetry.timestamp >= start, Telemetry.timestamp <= end)
+            .order_by(Telemetry.timestamp)
+        ).all()
+        return [
+            {
+                "timestamp": t.timestamp,
+                "latitude": t.latitude,
+                "longitude": t.longitude,
+                "count": 1,
+                "speed_min": t.speed,
+                "speed_max": t.speed,
+                "speed_avg": t.speed,
+                "battery_min": t.battery_level,
+                "battery_max": t.battery_level,
+                "battery_avg": t.battery_level,
+            }
+            for t in rows
+        ]
+
+    rows = session.exec(
+        select(TelemetryRollup)
+        .where(
+            TelemetryRollup.device_id == device_id,
+            TelemetryRollup.resolution == resolution,
+            TelemetryRollup.bucket_start >= start - timedelta(seconds=resolution),
+            TelemetryRollup.bucket_start <= end,
+        )
+        .order_by(TelemetryRollup.bucket_start)
+    ).all()
+    return [
+        {
+            "timestamp": r.bucket_start,
+            "latitude": r.latitude,
+            "longitude": r.longitude,
+            "count": r.count,
+            "speed_min": r.speed_min,
+            "speed_max": r.speed_max,
+            "speed_avg": r.speed_avg,
+            "battery_min": r.battery_min,
+            "battery_max": r.battery_max,
+            "battery_avg": r.battery_avg,
+        }
+        for r in rows
+    ]
+
+
+retention_worker = PeriodicWorker(
+    "telemetry-retention", ENV.TELEMETRY_ROLLUP_INTERVAL_SECONDS, run_retention, lock="retention"
+)
+register_gauge("geolockbox_retention_last_run_timestamp_seconds", "Start of the last retention cycle.", lambda: last_run["timestamp"])
+register_gauge("geolockbox_retention_last_run_duration_seconds", "Duration of the last retention cycle.", lambda: last_run["seconds"])
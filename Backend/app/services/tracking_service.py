@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.gps_service import GpsPoint, clean_track
+
+
+def summarize_track(
+    points: List[Tuple[datetime, float, float]], max_speed_kmh: float, accuracy_m: float
+) -> Optional[Dict[str, Any]]:
+    """
+    Cleans a time-ordered track and sums its geodesic length. Pure and picklable so it can
+    run in the CPU process pool. Returns None when fewer than two points survive.
+    """
+    from geopy.distance import geodesic
+
+    # drop duplicated and implausible fixes so a single GPS jump can't inflate the distance
+    track = clean_track(
+        [GpsPoint(*p) for p in points],
+        max_speed_kmh=max_speed_kmh,
+        accuracy_m=accuracy_m,
+    )
+    if len(track) < 2:
+        return None
+
+    total_distance_km = 0.0
+    for p1, p2 in zip(track, track[1:]):
+        total_distance_km += geodesic(
+            (p1.latitude, p1.longitude),
+            (p2.latitude, p2.longitude)
+        ).km
+
+    start, end = track[0], track[-1]
+    duration_hours = (end.timestamp - start.timestamp).total_seconds() / 3600
+    speed_avg = total_distance_km / duration_hours if duration_hours > 0 else 0
+
+    return {
+        "start": start,
+        "end": end,
+        "distance_km": total_distance_km,
+        "speed_avg": speed_avg,
+        "tracking": [[float(p.longitude), float(p.latitude)] for p in track],
+    }
@@ -0,0 +1,325 @@
+import calendar
+import logging
+from datetime import datetime, timedelta
+from math import ceil, cos, floor, radians
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, Float, Integer, String, text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from app.core.config import ENV
+from app.models.telemetry import Telemetry
+from app.models.telemetry_rollup import TelemetryRollup
+from app.services.lock_services import haversine_distance
+from app.services.retention_service import RAW, get_tiers, raw_horizon
+
+logger = logging.getLogger(__name__)
+
+# rtree_i32 stores 32 bit integers: coordinates in 1e-5 degrees (~1 m), time in seconds since 2020.
+# Entries are keyed by telemetry.seq, which VACUUM keeps and deletes never hand out again.
+COORD_SCALE = 100000
+TIME_OFFSET = 1577836800  # 2020-01-01T00:00:00, keeps seconds inside int32 until 2088
+METERS_PER_DEGREE = 111320.0
+MAX_CANDIDATES = 200000  # larger areas or windows have to be split by the client
+
+_SPATIAL_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS telemetry_rtree USING rtree_i32(
+        id, min_lat, max_lat, min_lon, max_lon, min_t, max_t
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS telemetry_rtree_insert AFTER INSERT ON telemetry
+    WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL AND new.timestamp IS NOT NULL BEGIN
+        INSERT OR REPLACE INTO telemetry_rtree VALUES (
+            new.seq,
+            CAST(round(new.latitude * {COORD_SCALE}) AS INTEGER), CAST(round(new.latitude * {COORD_SCALE}) AS INTEGER),
+            CAST(round(new.longitude * {COORD_SCALE}) AS INTEGER), CAST(round(new.longitude * {COORD_SCALE}) AS INTEGER),
+            CAST(strftime('%s', new.timestamp) AS INTEGER) - {TIME_OFFSET},
+            CAST(strftime('%s', new.timestamp) AS INTEGER) - {TIME_OFFSET}
+        );
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS telemetry_rtree_delete AFTER DELETE ON telemetry BEGIN
+        DELETE FROM telemetry_rtree WHERE id = old.seq;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS telemetry_rtree_update AFTER UPDATE OF latitude, longitude, timestamp ON telemetry BEGIN
+        DELETE FROM telemetry_rtree WHERE id = old.seq;
+        INSERT INTO telemetry_rtree SELECT
+            new.seq,
+            CAST(round(new.latitude * {COORD_SCALE}) AS INTEGER), CAST(round(new.latitude * {COORD_SCALE}) AS INTEGER),
+            CAST(round(new.longitude * {COORD_SCALE}) AS INTEGER), CAST(round(new.longitude * {COORD_SCALE}) AS INTEGER),
+            CAST(strftime('%s', new.timestamp) AS INTEGER) - {TIME_OFFSET},
+            CAST(strftime('%s', new.timestamp) AS INTEGER) - {TIME_OFFSET}
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL AND new.timestamp IS NOT NULL;
+    END""",
+]
+
+_BACKFILL = f"""
+INSERT OR REPLACE INTO telemetry_rtree
+SELECT seq,
+    CAST(round(latitude * {COORD_SCALE}) AS INTEGER), CAST(round(latitude * {COORD_SCALE}) AS INTEGER),
+    CAST(round(longitude * {COORD_SCALE}) AS INTEGER), CAST(round(longitude * {COORD_SCALE}) AS INTEGER),
+    CAST(strftime('%s', timestamp) AS INTEGER) - {TIME_OFFSET},
+    CAST(strftime('%s', timestamp) AS INTEGER) - {TIME_OFFSET}
+FROM telemetry
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL AND timestamp IS NOT NULL
+"""
+
+_IN_BOX = text("""
+SELECT t.id, t.device_id, t.latitude, t.longitude, t.speed, t.battery_level, t.timestamp
+FROM telemetry_rtree r JOIN telemetry t ON t.seq = r.id
+WHERE r.max_lat >= :lat0 AND r.min_lat <= :lat1
+  AND r.max_lon >= :lon0 AND r.min_lon <= :lon1
+  AND r.max_t >= :t0 AND r.min_t <= :t1
+  AND (:device_id IS NULL OR t.device_id = :device_id)
+LIMIT :cap
+""").columns(
+    id=String, device_id=String, latitude=Float, longitude=Float, speed=Float, battery_level=Integer, timestamp=DateTime,
+)
+
+_spatial_available = False
+
+
+def ensure_spatial_index(engine) -> bool:
+    """
+    Creates the R*-tree over (latitude, longitude, time) and fills it from existing telemetry once.
+    Returns False when SQLite was built without the rtree module.
+    """
+    global _spatial_available
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        existed = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'telemetry_rtree'").first() is not None
+        try:
+            for ddl in _SPATIAL_DDL:
+                conn.exec_driver_sql(ddl)
+        except OperationalError as exc:
+            logger.warning("Spatial telemetry index unavailable: %s", exc)
+            return False
+        if not existed:
+            rows = conn.exec_driver_sql(_BACKFILL).rowcount
+            logger.info("Spatial telemetry index built from %d points", rows)
+    _spatial_available = True
+    return True
+
+
+def _local(ts: datetime) -> datetime:
+    # stored timestamps are naive local time
+    if ts.tzinfo is not None:
+        return ts.astimezone().replace(tzinfo=None)
+    return ts
+
+
+def _index_time(ts: datetime) -> int:
+    # same reading as strftime('%s') in the triggers, which takes the naive value as UTC
+    return calendar.timegm(_local(ts).timetuple()) - TIME_OFFSET
+
+
+def points_in_box(
+    session: Session,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    start: datetime,
+    end: datetime,
+    device_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Candidate points from the R*-tree. Coordinates in the tree are rounded to 1e-5 degrees,
+    so callers needing exact bounds filter the result again.
+    """
+    if not _spatial_available:
+        q = select(Telemetry.id, Telemetry.device_id, Telemetry.latitude, Telemetry.longitude,
+                   Telemetry.speed, Telemetry.battery_level, Telemetry.timestamp).where(
+            Telemetry.latitude.between(min_lat, max_lat),
+            Telemetry.longitude.between(min_lon, max_lon),
+            Telemetry.timestamp >= _local(start),
+            Telemetry.timestamp <= _local(end),
+        )
+        if device_id is not None:
+            q = q.where(Telemetry.device_id == device_id)
+        rows = session.exec(q.limit(MAX_CANDIDATES + 1)).all()
+    else:
+        rows = session.execute(_IN_BOX, {
+            "lat0": floor(min_lat * COORD_SCALE),
+            "lat1": ceil(max_lat * COORD_SCALE),
+            "lon0": floor(min_lon * COORD_SCALE),
+            "lon1": ceil(max_lon * COORD_SCALE),
+            "t0": _index_time(start),
+            "t1": _index_time(end),
+            "device_id": device_id,
+            "cap": MAX_CANDIDATES + 1,
+        }).all()
+    if len(rows) > MAX_CANDIDATES:
+        raise HTTPException(status_code=400, detail="Query matches too many points, narrow the area or the time window")
+    return [r._asdict() for r in rows]
+
+
+def query_box(
+    session: Session,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    start: datetime,
+    end: datetime,
+    device_id: Optional[str] = None,
+    limit: int = 1000,
+) -> List[Dict[str, Any]]:
+    start, end = _local(start), _local(end)
+    points = [
+        p for p in points_in_box(session, min_lat, min_lon, max_lat, max_lon, start, end, device_id)
+        if min_lat <= p["latitude"] <= max_lat and min_lon <= p["longitude"] <= max_lon
+        and start <= p["timestamp"] <= end
+    ]
+    points.sort(key=lambda p: (p["timestamp"], p["id"]))
+    return points[:limit]
+
+
+def query_radius(
+    session: Session,
+    latitude: float,
+    longitude: float,
+    radius_m: float,
+    start: datetime,
+    end: datetime,
+) -> List[Dict[str, Any]]:
+    """
+    Devices with at least one point within `radius_m` of the given position during the window,
+    with their closest approach. Only reported points count, not the path between them.
+    """
+    start, end = _local(start), _local(end)
+    d_lat = radius_m / METERS_PER_DEGREE
+    d_lon = radius_m / (METERS_PER_DEGREE * max(cos(radians(latitude)), 1e-6))
+    candidates = points_in_box(
+        session, latitude - d_lat, longitude - d_lon, latitude + d_lat, longitude + d_lon, start, end
+    )
+
+    devices: Dict[str, Dict[str, Any]] = {}
+    for p in candidates:
+        if not start <= p["timestamp"] <= end:
+            continue
+        distance = haversine_distance(latitude, longitude, p["latitude"], p["longitude"])
+        if distance > radius_m:
+            continue
+        seen = devices.get(p["device_id"])
+        if seen is None:
+            devices[p["device_id"]] = {
+                "device_id": p["device_id"],
+                "first_seen": p["timestamp"],
+                "last_seen": p["timestamp"],
+                "points": 1,
+                "min_distance_m": distance,
+                "closest_at": p["timestamp"],
+            }
+            continue
+        seen["points"] += 1
+        seen["first_seen"] = min(seen["first_seen"], p["timestamp"])
+        seen["last_seen"] = max(seen["last_seen"], p["timestamp"])
+        if distance < seen["min_distance_m"]:
+            seen["min_distance_m"] = distance
+            seen["closest_at"] = p["timestamp"]
+
+    for seen in devices.values():
+        seen["min_distance_m"] = round(seen["min_distance_m"], 1)
+    return sorted(devices.values(), key=lambda d: d["min_distance_m"])
+
+
+def _interpolate(device_id: str, at: datetime, before, after, resolution: int, stamp) -> Dict[str, Any]:
+    if before is None or after is None or stamp(before) == stamp(after):
+        # only one side within reach: report that fix as is
+        nearest = before or after
+        latitude, longitude, interpolated = nearest.latitude, nearest.longitude, False
+    else:
+        f = (at - stamp(before)).total_seconds() / (stamp(after) - stamp(before)).total_seconds()
+        latitude = before.latitude + (after.latitude - before.latitude) * f
+        longitude = before.longitude + (after.longitude - before.longitude) * f
+        interpolated = True
+    raw = resolution == RAW
+    return {
+        "device_id": device_id,
+        "at": at,
+        "latitude": latitude,
+        "longitude": longitude,
+        "interpolated": interpolated,
+        "resolution": resolution,
+        "before": before if raw else None,
+        "after": after if raw else None,
+    }
+
+
+def _rollup_position_at(session: Session, device_id: str, at: datetime, max_gap: timedelta) -> Optional[Dict[str, Any]]:
+    """
+    Same as position_at from the position every rollup bucket keeps (its last point),
+    for times whose raw points are past retention.
+    """
+    now = datetime.now()
+    tiers = [t for t in get_tiers()[1:] if t.keep_days is None or at >= now - timedelta(days=t.keep_days)]
+    if not tiers:
+        return None
+    resolution = tiers[0].resolution
+    # neighbouring buckets can be a whole bucket apart
+    max_gap = max(max_gap, timedelta(seconds=2 * resolution))
+    R = TelemetryRollup
+    base = select(R).where(
+        R.device_id == device_id,
+        R.resolution == resolution,
+        R.latitude.is_not(None),
+        R.longitude.is_not(None),
+    )
+    before = session.exec(
+        base.where(R.bucket_start <= at, R.bucket_start >= at - max_gap, R.last_timestamp <= at)
+        .order_by(R.bucket_start.desc()).limit(1)
+    ).first()
+    after = session.exec(
+        base.where(R.bucket_start >= at - timedelta(seconds=resolution), R.bucket_start <= at + max_gap, R.last_timestamp >= at)
+        .order_by(R.bucket_start.asc()).limit(1)
+    ).first()
+    if before is None and after is None:
+        return None
+    return _interpolate(device_id, at, before, after, resolution, lambda r: r.last_timestamp)
+
+
+def position_at(
+    session: Session, device_id: str, at: datetime, max_gap: timedelta
+) -> Optional[Dict[str, Any]]:
+    """
+    Position of a device at `at`, linearly interpolated between the points just before and
+    just after it. Each side is one seek on the (device_id, timestamp) index. Past raw
+    retention the rollup positions are used, one per minute or hour.
+    """
+    at = _local(at)
+    horizon = raw_horizon()
+    if horizon is not None and at < horizon:
+        return _rollup_position_at(session, device_id, at, max_gap)
+
+    base = select(Telemetry).where(
+        Telemetry.device_id == device_id,
+        Telemetry.latitude.is_not(None),
+        Telemetry.longitude.is_not(None),
+    )
+    before = session.exec(
+        base.where(Telemetry.timestamp <= at, Telemetry.timestamp >= at - max_gap)
+        .order_by(Telemetry.timestamp.desc()).limit(1)
+    ).first()
+    after = session.exec(
+        base.where(Telemetry.timestamp >= at, Telemetry.timestamp <= at + max_gap)
+        .order_by(Telemetry.timestamp.asc()).limit(1)
+    ).first()
+    if before is None and after is None:
+        return None
+    return _interpolate(device_id, at, before, after, RAW, lambda t: t.timestamp)
+
+
+def check_raw_window(start: datetime):
+    """
+    Area queries need raw points, which are only kept for TELEMETRY_RAW_RETENTION_DAYS.
+    """
+    horizon = raw_horizon()
+    if horizon is not None and _local(start) < horizon:
+        raise HTTPException(
+            status_code=410,
+            detail=f"Raw telemetry is kept for {ENV.TELEMETRY_RAW_RETENTION_DAYS} days, "
+                   f"start must be after {horizon.isoformat(timespec='seconds')}; "
+                   "older per-device history is available from /telemetry/history",
+        )
@@ -0,0 +1,195 @@
+"""
+Binary telemetry frames (Content-Type: application/vnd.geolockbox.telemetry).
+
+A body is one or more frames, all integers little-endian:
+
+    frame   magic "GT" | version u8 (1) | device id length u8 | device id (ASCII) | count u16 | record * count
+    record  timestamp u32   unix epoch seconds, 0 = unknown (see ingest_frames)
+            latitude i32    1e-7 degrees
+            longitude i32   1e-7 degrees
+            speed u16       0.01 km/h, 0xFFFF = none
+            battery u8      percent, 0xFF = none
+            flags u8        reserved, 0
+
+A record is 16 bytes against ~130 for the JSON body of the same point.
+"""
+import struct
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session
+
+from app.core.config import ENV
+from app.models.telemetry import Telemetry
+from app.services.geofence_service import evaluate_point, store_events
+from app.services.gps_service import gps_filter, ACCEPTED, DUPLICATE
+from app.utils.helpers import generate_id
+
+CONTENT_TYPE = "application/vnd.geolockbox.telemetry"
+MAGIC = b"GT"
+VERSION = 1
+
+HEADER = struct.Struct("<2sBB")
+COUNT = struct.Struct("<H")
+RECORD = struct.Struct("<IiiHBB")
+
+COORD_SCALE = 1e-7
+SPEED_SCALE = 0.01
+NO_SPEED = 0xFFFF
+NO_BATTERY = 0xFF
+# firmware loop period, the spacing given to records sent without a GPS fix time
+RECORD_INTERVAL = timedelta(seconds=5)
+
+
+class FrameResult(NamedTuple):
+    frames: int
+    received: int
+    written: int
+    duplicates: int
+    rejected: int
+
+
+def iter_frames(body: bytes) -> Iterator[Tuple[str, Iterator[tuple]]]:
+    """
+    Yields (device_id, records) per frame. Records are unpacked straight from the request
+    buffer through a memoryview, nothing is copied before a record becomes a tuple.
+    """
+    view = memoryview(body)
+    offset = 0
+    while offset < len(view):
+        if len(view) - offset < HEADER.size:
+            raise HTTPException(status_code=400, detail=f"Truncated frame header at byte {offset}")
+        magic, version, id_len = HEADER.unpack_from(view, offset)
+        if magic != MAGIC or version != VERSION:
+            raise HTTPException(status_code=400, detail=f"Not a telemetry frame (version {VERSION}) at byte {offset}")
+        offset += HEADER.size
+
+        if len(view) - offset < id_len + COUNT.size:
+            raise HTTPException(status_code=400, detail=f"Truncated frame header at byte {offset}")
+        try:
+            device_id = str(view[offset:offset + id_len], "ascii")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail=f"Device id must be ASCII at byte {offset}")
+        offset += id_len
+        (count,) = COUNT.unpack_from(view, offset)
+        offset += COUNT.size
+
+        end = offset + count * RECORD.size
+        if end > len(view):
+            raise HTTPException(status_code=400, detail=f"Frame of {device_id} declares {count} records, body is too short")
+        if not device_id:
+            raise HTTPException(status_code=400, detail=f"Frame without device id at byte {offset}")
+        yield device_id, RECORD.iter_unpack(view[offset:end])
+        offset = end
+
+
+def decode_frames(body: bytes) -> List[Tuple[str, List[tuple]]]:
+    """
+    Checks the whole body before anything is stored, so a broken frame rejects the request.
+    """
+    return [(device_id, list(records)) for device_id, records in iter_frames(body)]
+
+
+def ingest_frames(session: Session, body: bytes) -> FrameResult:
+    """
+    Stores every point of the frames in one INSERT ... ON CONFLICT DO NOTHING. Points go through
+    the same GPS cleaning and geofence detection as single JSON points. IDs derive from the
+    device and timestamp, so a resent frame is not stored twice.
+
+    Records without a timestamp (0) are placed RECORD_INTERVAL apart, the last record of the
+    device in the body at the receive time, so they keep their order and do not collide.
+    """
+    frames = decode_frames(body)
+    now = datetime.now()
+    remaining = Counter()
+    for device_id, records in frames:
+        remaining[device_id] += len(records)
+    from_epoch = datetime.fromtimestamp
+    filtering = ENV.GPS_FILTER_ENABLED
+
+    rows: List[Dict[str, Any]] = []
+    keys = []
+    received = duplicates = rejected = 0
+    for device_id, records in frames:
+        received += len(records)
+        for epoch, lat, lon, speed, battery, _ in records:
+            remaining[device_id] -= 1
+            timestamp = from_epoch(epoch) if epoch else now - remaining[device_id] * RECORD_INTERVAL
+            latitude, longitude = lat * COORD_SCALE, lon * COORD_SCALE
+            key = f"{device_id}|{epoch}" if epoch else None
+
+            if filtering:
+                result = gps_filter.process(device_id, latitude, longitude, timestamp, key=key)
+                if result.status == DUPLICATE:
+                    duplicates += 1
+                    continue
+                if result.status != ACCEPTED:
+                    rejected += 1
+                    continue
+                keys.append((device_id, result.key, latitude, longitude, timestamp))
+                latitude, longitude = result.latitude, result.longitude
+            elif not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                rejected += 1
+                continue
+
+            rows.append({
+                "id": generate_id("TEL", key=key, at=timestamp) if key else generate_id("TEL", at=timestamp),
+                "device_id": device_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "speed": None if speed == NO_SPEED else speed * SPEED_SCALE,
+                "battery_level": None if battery == NO_BATTERY else battery,
+                "timestamp": timestamp,
+            })
+
+    written = 0
+    if rows:
+        try:
+            written = session.execute(
+                insert(Telemetry.__table__).on_conflict_do_nothing(index_elements=["id"]), rows
+            ).rowcount
+            session.commit()
+        except Exception:
+            # nothing of the frame was stored, the resent frame must not be taken for duplicates
+            session.rollback()
+            for device_id, key, latitude, longitude, timestamp in keys:
+                gps_filter.discard(device_id, key, latitude, longitude, timestamp)
+            raise
+        duplicates += len(rows) - written
+
+    for (device_id, key, *_), row in zip(keys, rows):
+        gps_filter.bind(device_id, key, row["id"], share=False)
+    for device_id in {device_id for device_id, *_ in keys}:
+        gps_filter.share(device_id)
+
+    if ENV.GEOFENCE_EVENTS_ENABLED:
+        events = []
+        for row in rows:
+            for event in evaluate_point(session, row["device_id"], row["latitude"], row["longitude"], row["timestamp"]):
+                event["telemetry_id"] = row["id"]
+                events.append(event)
+        store_events(session, events)
+
+    return FrameResult(len(frames), received, written, duplicates, rejected)
+
+
+def encode_frame(device_id: str, points) -> bytes:
+    """
+    Builds one frame from (timestamp, latitude, longitude, speed, battery_level) tuples;
+    the Python side of the firmware encoder, used by tests and benchmarks.
+    """
+    raw_id = device_id.encode("ascii")
+    parts = [HEADER.pack(MAGIC, VERSION, len(raw_id)), raw_id, COUNT.pack(len(points))]
+    for timestamp, latitude, longitude, speed, battery in points:
+        parts.append(RECORD.pack(
+            int(timestamp.timestamp()) if timestamp else 0,
+            round(latitude / COORD_SCALE),
+            round(longitude / COORD_SCALE),
+            NO_SPEED if speed is None else min(round(speed / SPEED_SCALE), NO_SPEED - 1),
+            NO_BATTERY if battery is None else battery,
+            0,
+        ))
+    return b"".join(parts)
@@ -1,5 +1,13 @@
-import uuid
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
 from fastapi import HTTPException
+from sqlalchemy import Integer, MetaData, inspect
+from sqlalchemy.schema import CreateTable
 from sqlmodel import SQLModel, Session
 
 def get_or_404(session: Session, model, id: str):
@@ -9,9 +17,98 @@ def get_or_404(session: Session, model, id: str):
     return obj
 
 
+def _add_sequence_keys(engine):
+    """
+    Tables that got an INTEGER PRIMARY KEY after they were first created are rebuilt once with it.
+    The new key takes each row's current rowid, so indexes keyed by rowid (R*-tree, full text)
+    still point at the right rows.
+    """
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in SQLModel.metadata.sorted_tables:
+            key = list(table.primary_key.columns)
+            if len(key) != 1 or not isinstance(key[0].type, Integer) or not inspector.has_table(table.name):
+                continue
+            existing = [c["name"] for c in inspector.get_columns(table.name)]
+            if key[0].name in existing:
+                continue
+            columns = ", ".join(c for c in existing if c in table.c)
+            rebuilt = f"_{table.name}_rebuild"
+            conn.execute(CreateTable(table.to_metadata(MetaData(), name=rebuilt)))
+            conn.exec_driver_sql(
+                f"INSERT INTO {rebuilt} ({key[0].name}, {columns}) SELECT rowid, {columns} FROM {table.name}"
+            )
+            # also drops the old table's indexes and triggers, they are created again below and by their services
+            conn.exec_driver_sql(f"DROP TABLE {table.name}")
+            conn.exec_driver_sql(f"ALTER TABLE {rebuilt} RENAME TO {table.name}")
+
+
 def create_db_and_tables(engine):
+    if engine.dialect.name == "sqlite":
+        _add_sequence_keys(engine)
     SQLModel.metadata.create_all(engine)
+    # create_all skips the indexes of tables that already exist
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+# ---------- Time-ordered IDs (ULID: 48 bit ms timestamp + 80 bit entropy) ----------
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+
+_ulid_lock = threading.Lock()
+_last_ms = 0
+_last_random = 0
+
+
+def _reset_ulid_state():
+    # a forked worker must not keep incrementing the parent's random part
+    global _last_ms, _last_random
+    _last_ms = 0
+    _last_random = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_ulid_state)
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(_CROCKFORD[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_ulid(key: Optional[str] = None, at: Optional[datetime] = None) -> str:
+    """
+    26 char Crockford base32 ULID. IDs sort by creation time, and IDs made in the same
+    millisecond by one process are strictly increasing.
+    With `key` the entropy is derived from it and the time part from `at`, so the same
+    key and `at` always give the same ID.
+    """
+    if key is not None:
+        ms = int(at.timestamp() * 1000) if at is not None else 0
+        entropy = int.from_bytes(hashlib.sha256(key.encode()).digest()[:_RANDOM_BITS // 8], "big")
+        return _encode(ms, 10) + _encode(entropy, 16)
+
+    global _last_ms, _last_random
+    with _ulid_lock:
+        ms = time.time_ns() // 1_000_000
+        if ms <= _last_ms:
+            # same millisecond (or the clock went back): keep the order by bumping the random part
+            ms = _last_ms
+            entropy = _last_random + 1
+            if entropy >> _RANDOM_BITS:
+                ms += 1
+                entropy = int.from_bytes(os.urandom(_RANDOM_BITS // 8), "big")
+        else:
+            entropy = int.from_bytes(os.urandom(_RANDOM_BITS // 8), "big")
+        _last_ms = ms
+        _last_random = entropy
+    return _encode(ms, 10) + _encode(entropy, 16)
 
 
-def generate_id(prefix: str) -> str:
-    return f"{prefix}-{uuid.uuid4().hex[:8].upper()}"
\ No newline at end of file
+def generate_id(prefix: str, key: Optional[str] = None, at: Optional[datetime] = None) -> str:
+    return f"{prefix}-{new_ulid(key, at)}"
@@ -0,0 +1,87 @@
+"""
+Throughput of the ingest GPS filter at fleet point rate.
+
+Every box posts one point every 5 s (see Firmware/src/main.cpp), so a fleet of N boxes
+produces N / 5 points per second. The stream below mixes in retries, out-of-order
+deliveries and GPS jumps at the given rates.
+
+    cd Backend
+    python -m benchmarks.bench_gps_filter --devices 10000 --minutes 5
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app.services.gps_service import GpsFilter
+
+POST_INTERVAL_SECONDS = 5
+
+
+def build_stream(devices: int, minutes: int, dup_rate: float, swap_rate: float, jump_rate: float, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2025, 11, 20, 9, 0, 0)
+    positions = {
+        f"BOX{i:05d}": [-19.9 + rng.uniform(-0.2, 0.2), -44.0 + rng.uniform(-0.2, 0.2)]
+        for i in range(devices)
+    }
+
+    stream = []
+    for step in range(minutes * 60 // POST_INTERVAL_SECONDS):
+        ts = start + timedelta(seconds=step * POST_INTERVAL_SECONDS)
+        for device_id, pos in positions.items():
+            # ~40 km/h in a random direction
+            pos[0] += rng.uniform(-0.0005, 0.0005)
+            pos[1] += rng.uniform(-0.0005, 0.0005)
+            lat, lon = pos
+            if rng.random() < jump_rate:
+                lat, lon = lat + rng.uniform(0.2, 1.0), lon - rng.uniform(0.2, 1.0)
+            stream.append((device_id, lat, lon, ts))
+            if rng.random() < dup_rate:
+                stream.append((device_id, lat, lon, ts))
+
+    # out-of-order delivery: swap some neighbouring points of the same device
+    stride = devices
+    for i in range(len(stream) - stride):
+        if rng.random() < swap_rate:
+            stream[i], stream[i + stride] = stream[i + stride], stream[i]
+    return stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument("--minutes", type=int, default=5)
+    parser.add_argument("--dup-rate", type=float, default=0.05)
+    parser.add_argument("--swap-rate", type=float, default=0.02)
+    parser.add_argument("--jump-rate", type=float, default=0.005)
+    parser.add_argument("--smoothing", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    stream = build_stream(args.devices, args.minutes, args.dup_rate, args.swap_rate, args.jump_rate, args.seed)
+    gps = GpsFilter(smoothing=args.smoothing)
+
+    tracemalloc.start()
+    statuses = {}
+    t0 = time.perf_counter()
+    for device_id, lat, lon, ts in stream:
+        status = gps.process(device_id, lat, lon, ts).status
+        statuses[status] = statuses.get(status, 0) + 1
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rate = len(stream) / elapsed
+    required = args.devices / POST_INTERVAL_SECONDS
+    print(f"points:          {len(stream)}")
+    print(f"elapsed:         {elapsed:.2f} s")
+    print(f"throughput:      {rate:,.0f} points/s (tracemalloc on)")
+    print(f"fleet rate:      {required:,.0f} points/s for {args.devices} boxes -> {rate / required:.1f}x headroom")
+    print(f"state per box:   {peak / args.devices:,.0f} bytes (peak)")
+    print(f"results:         {statuses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Insert rate and primary-key index size: legacy random IDs vs time-ordered ULIDs.
+
+The legacy scheme is PREFIX-<8 random hex chars> (32 bits, scattered B-tree inserts);
+the current one is PREFIX-<ULID> from app.utils.helpers.generate_id.
+
+    cd Backend
+    python -m benchmarks.bench_ids --rows 1000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from app.utils.helpers import generate_id
+
+SCHEMA = """
+CREATE TABLE telemetry (
+    device_id VARCHAR, latitude FLOAT, longitude FLOAT, speed FLOAT,
+    battery_level INTEGER, timestamp DATETIME, id VARCHAR NOT NULL, PRIMARY KEY (id)
+)
+"""
+
+
+def legacy_id(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:8].upper()}"
+
+
+def run(name, make_id, rows: int, batch: int, cache_kib: int):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA cache_size=-{cache_kib}")
+    conn.execute(SCHEMA)
+
+    now = datetime.now().isoformat(sep=" ")
+    collisions = 0
+    t0 = time.perf_counter()
+    for start in range(0, rows, batch):
+        values = [
+            ("BOX001", -19.9, -44.1, 40.0, 88, now, make_id("TEL"))
+            for _ in range(min(batch, rows - start))
+        ]
+        with conn:
+            cur = conn.executemany("INSERT OR IGNORE INTO telemetry VALUES (?, ?, ?, ?, ?, ?, ?)", values)
+            collisions += len(values) - cur.rowcount
+    elapsed = time.perf_counter() - t0
+
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    try:
+        index_pages = conn.execute(
+            "SELECT count(*) FROM dbstat WHERE name = 'sqlite_autoindex_telemetry_1'"
+        ).fetchone()[0]
+        index_size = f"{index_pages * page_size / 1e6:,.1f} MB"
+    except sqlite3.OperationalError:
+        index_size = "n/a (SQLite built without dbstat)"
+    conn.close()
+    file_size = os.path.getsize(path)
+    os.remove(path)
+
+    print(f"{name:8s} {rows / elapsed:>12,.0f} rows/s   index {index_size:>10s}   "
+          f"file {file_size / 1e6:,.1f} MB   collisions {collisions}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--cache-kib", type=int, default=2000, help="SQLite page cache (default matches SQLite's 2 MB)")
+    args = parser.parse_args()
+
+    expected = args.rows * (args.rows - 1) / 2 / 2 ** 32
+    print(f"{args.rows:,} rows, commit every {args.batch}; expected legacy collisions ~{expected:,.0f}")
+    run("legacy", legacy_id, args.rows, args.batch, args.cache_kib)
+    run("ulid", generate_id, args.rows, args.batch, args.cache_kib)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Cold start of one API worker, every run in a fresh interpreter:
+
+    import     python -c "import app.main"
+    create     create_app(): routers, models, middlewares
+    startup    lifespan startup on an empty database (schema setup, background jobs)
+    request    first GET / through the ASGI app
+    shutdown   lifespan shutdown
+
+    cd Backend
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --importtime 25   # slowest modules by self time
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+application = app.main.create_app()
+t2 = time.perf_counter()
+
+
+async def first_request():
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/", "raw_path": b"/", "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    await application(scope, receive, send)
+    assert messages[0]["status"] == 200, messages
+
+
+async def main():
+    async with application.router.lifespan_context(application):
+        t3 = time.perf_counter()
+        await first_request()
+        t4 = time.perf_counter()
+    t5 = time.perf_counter()
+    return t3, t4, t5
+
+t3, t4, t5 = asyncio.run(main())
+print(json.dumps({
+    "import": t1 - t0, "create": t2 - t1, "startup": t3 - t2, "request": t4 - t3, "shutdown": t5 - t4,
+    "total": t5 - t0,
+}))
+"""
+
+PHASES = ("import", "create", "startup", "request", "shutdown", "total")
+
+
+def probe_env(db_dir: str, run: int):
+    return dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(db_dir, f'startup-{run}.db')}",
+        # the retention and ETA jobs would start work right after startup
+        TELEMETRY_RETENTION_ENABLED="false",
+        ETA_ENABLED="false",
+    )
+
+
+def run_probes(runs: int):
+    db_dir = tempfile.mkdtemp(prefix="geolockbox-startup-")
+    results = []
+    for i in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=probe_env(db_dir, i),
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'phase':10s} {'median ms':>10s} {'min ms':>10s} {'max ms':>10s}")
+    for phase in PHASES:
+        values = [r[phase] * 1000 for r in results]
+        print(f"{phase:10s} {statistics.median(values):10.1f} {min(values):10.1f} {max(values):10.1f}")
+
+
+def run_importtime(top: int):
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main; app.main.create_app()"],
+        cwd=BACKEND_DIR, env=probe_env(tempfile.mkdtemp(), 0), check=True, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+
+    print(f"{'self ms':>8s} {'cumul ms':>9s}  module")
+    for self_us, cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{self_us / 1000:8.1f} {cumulative_us / 1000:9.1f}  {name}")
+    print(f"{sum(r[0] for r in rows) / 1000:8.1f}            total import time, {len(rows)} modules")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, metavar="N", help="list the N slowest imports instead")
+    args = parser.parse_args()
+
+    if args.importtime:
+        run_importtime(args.importtime)
+    else:
+        run_probes(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Spatio-temporal telemetry queries with and without the R*-tree (app.services.trajectory_service).
+
+Fills a temporary database with random-walk tracks (one point every 30 s per device), builds
+the index from it, then times:
+
+    radius     devices within --radius-m of a random point during a --window-minutes window
+    bbox       points inside a ~1 km box during the same window
+    position   interpolated position of a random device at a random time
+
+The baseline is the same query without the R*-tree, where only the (device_id, timestamp)
+index exists and radius/bbox have to scan the table.
+
+    cd Backend
+    python -m benchmarks.bench_trajectory --points 10000000
+    python -m benchmarks.bench_trajectory --points 200000 --queries 50   # quick run
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine
+
+import app.services.trajectory_service as trajectory
+from app.core.config import ENV
+from app.models.telemetry import Telemetry
+
+CENTER = (-23.55, -46.63)
+SPREAD_DEG = 0.25  # ~28 km around the center
+INTERVAL_SECONDS = 30
+START = datetime(2025, 1, 1)
+INSERT = "INSERT INTO telemetry (device_id, latitude, longitude, speed, battery_level, timestamp, id) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+
+def fill(path: str, points: int, devices: int, batch: int = 50000):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine, tables=[Telemetry.__table__])
+    engine.dispose()
+
+    rnd = random.Random(1)
+    walkers = [
+        [CENTER[0] + rnd.uniform(-SPREAD_DEG, SPREAD_DEG), CENTER[1] + rnd.uniform(-SPREAD_DEG, SPREAD_DEG)]
+        for _ in range(devices)
+    ]
+    conn = sqlite3.connect(path)
+    rows = []
+    for i in range(points):
+        step, d = divmod(i, devices)
+        pos = walkers[d]
+        # ~10 m per step, kept inside the area
+        pos[0] = min(max(pos[0] + rnd.uniform(-1e-4, 1e-4), CENTER[0] - SPREAD_DEG), CENTER[0] + SPREAD_DEG)
+        pos[1] = min(max(pos[1] + rnd.uniform(-1e-4, 1e-4), CENTER[1] - SPREAD_DEG), CENTER[1] + SPREAD_DEG)
+        ts = START + timedelta(seconds=step * INTERVAL_SECONDS)
+        rows.append((f"BOX{d:05d}", pos[0], pos[1], 30.0, 90, ts.isoformat(sep=" ", timespec="microseconds"), f"TEL-{i:026d}"))
+        if len(rows) == batch:
+            with conn:
+                conn.executemany(INSERT, rows)
+            rows = []
+    if rows:
+        with conn:
+            conn.executemany(INSERT, rows)
+    conn.close()
+    return START + timedelta(seconds=(points // devices) * INTERVAL_SECONDS)
+
+
+def timed(fn, cases):
+    durations, results = [], 0
+    for case in cases:
+        t0 = time.perf_counter()
+        results += len(fn(*case) or ())
+        durations.append((time.perf_counter() - t0) * 1000)
+    return durations, results
+
+
+def report(name, durations, results):
+    print(f"{name:20s} {statistics.median(durations):10.2f} {max(durations):10.2f} {results / len(durations):10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10_000_000)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--baseline-queries", type=int, default=3, help="full scans get slow on large tables")
+    parser.add_argument("--radius-m", type=float, default=500)
+    parser.add_argument("--window-minutes", type=int, default=60)
+    args = parser.parse_args()
+    # the generated tracks are older than raw retention, which would send position lookups to the rollups
+    ENV.TELEMETRY_RETENTION_ENABLED = False
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        t0 = time.perf_counter()
+        end = fill(path, args.points, args.devices)
+        print(f"{args.points:,} points of {args.devices} devices in {time.perf_counter() - t0:.1f} s")
+
+        engine = create_engine(f"sqlite:///{path}")
+        t0 = time.perf_counter()
+        if not trajectory.ensure_spatial_index(engine):
+            raise SystemExit("SQLite was built without the rtree module")
+        print(f"R*-tree built in {time.perf_counter() - t0:.1f} s, database {os.path.getsize(path) / 1e6:,.0f} MB")
+
+        rnd = random.Random(2)
+        window = timedelta(minutes=args.window_minutes)
+        span = (end - START - window).total_seconds()
+
+        def random_window():
+            start = START + timedelta(seconds=rnd.uniform(0, max(span, 0)))
+            return start, start + window
+
+        radius_cases, box_cases, position_cases = [], [], []
+        for _ in range(args.queries):
+            lat = CENTER[0] + rnd.uniform(-SPREAD_DEG, SPREAD_DEG)
+            lon = CENTER[1] + rnd.uniform(-SPREAD_DEG, SPREAD_DEG)
+            radius_cases.append((lat, lon, args.radius_m, *random_window()))
+            box_cases.append((lat - 0.005, lon - 0.005, lat + 0.005, lon + 0.005, *random_window()))
+            at = START + timedelta(seconds=rnd.uniform(0, (end - START).total_seconds()))
+            position_cases.append((f"BOX{rnd.randrange(args.devices):05d}", at, timedelta(minutes=10)))
+
+        with Session(engine) as session:
+            print(f"{'query':20s} {'median ms':>10s} {'max ms':>10s} {'rows':>10s}")
+            for indexed in (True, False):
+                trajectory._spatial_available = indexed
+                n = args.queries if indexed else args.baseline_queries
+                label = "rtree" if indexed else "scan"
+                report(f"radius  {label}", *timed(lambda *c: trajectory.query_radius(session, *c), radius_cases[:n]))
+                report(f"bbox    {label}", *timed(lambda *c: trajectory.query_box(session, *c), box_cases[:n]))
+            report("position", *timed(lambda *c: [trajectory.position_at(session, *c)], position_cases))
+        engine.dispose()
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Telemetry ingest throughput: JSON points (POST /telemetry) vs binary frames (POST /telemetry/frames).
+
+All paths run in-process against a temporary SQLite database:
+
+    json      pydantic parses each point's body, then the create_telemetry route stores it
+    frames    ingest_frames() decodes and stores frames of --frame-points points per device
+    http      the same frames POSTed to /telemetry/frames through the whole app (TestClient)
+
+Points are posted every 5 s per box like the firmware does; all of them pass the GPS filter.
+
+    cd Backend
+    python -m benchmarks.bench_wire --devices 200 --points 20000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi import Response
+from sqlalchemy import func
+from sqlmodel import Session, SQLModel, create_engine, select
+
+import app.models.delivery, app.models.device, app.models.geofence_event  # noqa: F401  tables
+from app.models.telemetry import Telemetry
+from app.routes.telemetry_routes import create_telemetry
+from app.schemas.telemetry_schemas import TelemetryCreate
+from app.services.wire_service import CONTENT_TYPE, decode_frames, encode_frame, ingest_frames
+
+POST_INTERVAL_SECONDS = 5
+
+
+def build_points(devices: int, points: int, prefix: str, seed: int = 1):
+    rnd = random.Random(seed)
+    start = datetime(2025, 1, 1, 8)
+    positions = [[-19.9 + rnd.uniform(-0.2, 0.2), -44.0 + rnd.uniform(-0.2, 0.2)] for _ in range(devices)]
+    tracks = {f"{prefix}{d:05d}": [] for d in range(devices)}
+    for i in range(points):
+        step, d = divmod(i, devices)
+        pos = positions[d]
+        pos[0] += rnd.uniform(-1e-4, 1e-4)
+        pos[1] += rnd.uniform(-1e-4, 1e-4)
+        ts = start + timedelta(seconds=step * POST_INTERVAL_SECONDS)
+        tracks[f"{prefix}{d:05d}"].append((ts, round(pos[0], 6), round(pos[1], 6), round(rnd.uniform(0, 60), 2), 88))
+    return tracks
+
+
+def json_bodies(tracks):
+    # the firmware's ArduinoJson document
+    return [
+        json.dumps({
+            "device_id": device_id, "latitude": lat, "longitude": lon, "speed": speed,
+            "battery_level": battery, "timestamp": ts.isoformat(),
+        }).encode()
+        for device_id, points in tracks.items()
+        for ts, lat, lon, speed, battery in points
+    ]
+
+
+def frame_bodies(tracks, frame_points: int):
+    return [
+        encode_frame(device_id, points[i:i + frame_points])
+        for device_id, points in tracks.items()
+        for i in range(0, len(points), frame_points)
+    ]
+
+
+def run_json(engine, bodies):
+    t0 = time.perf_counter()
+    with Session(engine) as session:
+        for body in bodies:
+            create_telemetry(TelemetryCreate.model_validate_json(body), Response(), None, session)
+    return time.perf_counter() - t0
+
+
+def run_frames(engine, bodies):
+    t0 = time.perf_counter()
+    with Session(engine) as session:
+        for body in bodies:
+            ingest_frames(session, body)
+    return time.perf_counter() - t0
+
+
+def run_http(engine, bodies):
+    from fastapi.testclient import TestClient
+    from app.core.database import get_session
+    from app.main import create_app
+
+    def session_override():
+        with Session(engine) as session:
+            yield session
+
+    app = create_app()
+    app.dependency_overrides[get_session] = session_override
+    client = TestClient(app)
+    headers = {"Content-Type": CONTENT_TYPE}
+    t0 = time.perf_counter()
+    for body in bodies:
+        client.post("/telemetry/frames", content=body, headers=headers).raise_for_status()
+    return time.perf_counter() - t0
+
+
+def count(engine, prefix):
+    with Session(engine) as session:
+        return session.exec(select(func.count()).where(Telemetry.device_id.startswith(prefix))).one()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--frame-points", type=int, nargs="+", default=[1, 12, 60])
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        engine = create_engine(f"sqlite:///{path}")
+        SQLModel.metadata.create_all(engine)
+
+        tracks = build_points(args.devices, args.points, "JSN")
+        bodies = json_bodies(tracks)
+        t0 = time.perf_counter()
+        for body in bodies:
+            TelemetryCreate.model_validate_json(body)
+        decode = time.perf_counter() - t0
+        elapsed = run_json(engine, bodies)
+        size = sum(len(b) for b in bodies)
+
+        print(f"{'path':12s} {'points/s':>10s} {'decode µs/pt':>13s} {'bytes/pt':>9s} {'stored':>8s}")
+        print(f"{'json':12s} {args.points / elapsed:10,.0f} {decode / args.points * 1e6:13.2f} "
+              f"{size / args.points:9.1f} {count(engine, 'JSN'):8,d}")
+
+        for n in args.frame_points:
+            prefix = f"F{n}-"
+            bodies = frame_bodies(build_points(args.devices, args.points, prefix), n)
+            t0 = time.perf_counter()
+            for body in bodies:
+                decode_frames(body)
+            decode = time.perf_counter() - t0
+            elapsed = run_frames(engine, bodies)
+            size = sum(len(b) for b in bodies)
+            print(f"{f'frames x{n}':12s} {args.points / elapsed:10,.0f} {decode / args.points * 1e6:13.2f} "
+                  f"{size / args.points:9.1f} {count(engine, prefix):8,d}")
+
+            prefix = f"H{n}-"
+            bodies = frame_bodies(build_points(args.devices, args.points, prefix), n)
+            elapsed = run_http(engine, bodies)
+            print(f"{f'http x{n}':12s} {args.points / elapsed:10,.0f} {decode / args.points * 1e6:13.2f} "
+                  f"{size / args.points:9.1f} {count(engine, prefix):8,d}")
+        engine.dispose()
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
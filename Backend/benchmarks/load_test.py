@@ -0,0 +1,273 @@
+"""
+Fleet simulator and load test for the GeoLockBox API.
+
+Each simulated box runs the firmware loop from Firmware/src/main.cpp (POST /telemetry,
+PATCH /devices/{id}, GET /devices/{id}/lock every `--interval` seconds) while driving
+along a route interpolated from Documents/GPS History/device_tracking_log_*.json.
+Dashboard readers poll the list and history endpoints concurrently. At the end the
+tool prints throughput, p50/p95/p99 latency and error rate per endpoint.
+
+With `--frame-points N` the boxes buffer their points and send them as binary frames
+(POST /telemetry/frames, app/services/wire_service.py) every N cycles instead of
+one JSON POST /telemetry per cycle.
+
+Requires httpx (pip install httpx).
+
+    cd Backend
+    # against a running server
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --boxes 2000 --duration 60
+    # or let the tool start a local uvicorn on a throwaway database
+    python -m benchmarks.load_test --start-server --boxes 2000 --readers 20 --duration 60
+    # binary frames of 12 points, one per minute per box like the firmware's frame mode
+    python -m benchmarks.load_test --start-server --boxes 2000 --frame-points 12 --duration 120
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from app.services.lock_services import haversine_distance
+from app.services.wire_service import CONTENT_TYPE, encode_frame
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY = os.path.join(os.path.dirname(BACKEND_DIR), "Documents", "GPS History")
+
+
+class Route:
+    """
+    Polyline from a tracking log, sampled by distance travelled.
+    """
+
+    def __init__(self, points, speed_kmh: float):
+        self.points = points  # [(lat, lon)]
+        self.speed_kmh = speed_kmh or 40.0
+        self.cumulative = [0.0]
+        for a, b in zip(points, points[1:]):
+            self.cumulative.append(self.cumulative[-1] + haversine_distance(a[0], a[1], b[0], b[1]))
+        self.length_m = self.cumulative[-1]
+
+    @classmethod
+    def load(cls, path: str) -> "Route":
+        with open(path) as f:
+            data = json.load(f)
+        # tracking files store [lng, lat]
+        points = [(lat, lng) for lng, lat in data["tracking"]]
+        return cls(points, data.get("speedAvgKmH"))
+
+    def position(self, distance_m: float):
+        if self.length_m == 0:
+            return self.points[0]
+        d = distance_m % self.length_m
+        i = max(bisect_right(self.cumulative, d) - 1, 0)
+        if i >= len(self.points) - 1:
+            return self.points[-1]
+        seg = self.cumulative[i + 1] - self.cumulative[i]
+        t = (d - self.cumulative[i]) / seg if seg else 0.0
+        (lat1, lon1), (lat2, lon2) = self.points[i], self.points[i + 1]
+        return lat1 + (lat2 - lat1) * t, lon1 + (lon2 - lon1) * t
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float):
+        print(f"\n{'endpoint':34s} {'req':>8s} {'req/s':>9s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'errors':>8s}")
+        total = 0
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            n = len(values)
+            total += n
+
+            def pct(p):
+                return values[min(int(p * n), n - 1)] * 1000
+
+            errors = self.errors.get(endpoint, 0)
+            print(f"{endpoint:34s} {n:8d} {n / elapsed:9.1f} {pct(0.50):8.1f} {pct(0.95):8.1f} {pct(0.99):8.1f} "
+                  f"{errors / n:7.1%}")
+        print(f"{'total':34s} {total:8d} {total / elapsed:9.1f}")
+
+
+async def call(client, stats: Stats, endpoint: str, method: str, url: str, **kwargs):
+    t0 = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        ok = response.status_code < 400
+    except Exception:
+        response = None
+        ok = False
+    stats.record(endpoint, time.perf_counter() - t0, ok)
+    return response
+
+
+async def box_loop(client, stats, device_id: str, route: Route, interval: float, stop_at: float, rng: random.Random,
+                   frame_points: int = 0):
+    # firmware timing: one cycle every `interval` seconds, boxes start out of phase
+    await asyncio.sleep(rng.uniform(0, interval))
+    distance = rng.uniform(0, route.length_m)
+    speed_mps = route.speed_kmh / 3.6 * rng.uniform(0.7, 1.3)
+    pending = []
+
+    while time.monotonic() < stop_at:
+        started = time.monotonic()
+        distance += speed_mps * interval
+        lat, lon = route.position(distance)
+
+        if frame_points:
+            pending.append((datetime.now(), lat, lon, speed_mps * 3.6, 88))
+            if len(pending) >= frame_points:
+                await call(client, stats, "POST /telemetry/frames", "POST", "/telemetry/frames",
+                           content=encode_frame(device_id, pending), headers={"Content-Type": CONTENT_TYPE})
+                pending = []
+        else:
+            await call(client, stats, "POST /telemetry", "POST", "/telemetry", json={
+                "device_id": device_id,
+                "latitude": round(lat, 6),
+                "longitude": round(lon, 6),
+                "speed": round(speed_mps * 3.6, 2),
+                "battery_level": 88,
+                "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            })
+        await call(client, stats, "PATCH /devices/{id}", "PATCH", f"/devices/{device_id}", json={
+            "latitude": round(lat, 6), "longitude": round(lon, 6), "battery_level": 88,
+        })
+        await call(client, stats, "GET /devices/{id}/lock", "GET", f"/devices/{device_id}/lock")
+
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+async def reader_loop(client, stats, device_ids, interval: float, stop_at: float, rng: random.Random):
+    await asyncio.sleep(rng.uniform(0, interval))
+    while time.monotonic() < stop_at:
+        device_id = rng.choice(device_ids)
+        since = (datetime.now() - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        await call(client, stats, "GET /devices", "GET", "/devices")
+        await call(client, stats, "GET /deliveries", "GET", "/deliveries")
+        await call(client, stats, "GET /devices/{id}", "GET", f"/devices/{device_id}")
+        await call(client, stats, "GET /telemetry/history", "GET", "/telemetry/history",
+                   params={"device_id": device_id, "start": since})
+        await asyncio.sleep(interval)
+
+
+async def seed(client, device_ids, routes, rng: random.Random):
+    devices = [{"id": d, "name": d, "status": "active", "battery_level": 88} for d in device_ids]
+    deliveries = []
+    for i, device_id in enumerate(device_ids):
+        lat, lon = rng.choice(routes).points[-1]
+        deliveries.append({
+            "id": f"LOADTEST-DEL-{i:06d}", "device_id": device_id, "status": "in_progress",
+            "dest_lat": lat, "dest_lon": lon, "geofence_radius": 200,
+        })
+    for path, rows in (("/devices/bulk", devices), ("/deliveries/bulk", deliveries)):
+        for start in range(0, len(rows), 1000):
+            response = await client.post(path, json=rows[start:start + 1000])
+            response.raise_for_status()
+
+
+def start_server(port: int, workers: int):
+    db = os.path.join(tempfile.mkdtemp(prefix="geolockbox-load-"), "load.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db}")
+    cmd = [sys.executable, "-m", "uvicorn", "--factory", "app.main:create_app", "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning", "--workers", str(workers)]
+    process = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    print(f"started uvicorn (pid {process.pid}) on port {port}, database {db}")
+    return process
+
+
+async def wait_ready(client, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not come up")
+
+
+async def run(args):
+    try:
+        import httpx
+    except ImportError:
+        sys.exit("the load test needs httpx: pip install httpx")
+
+    rng = random.Random(args.seed)
+    files = sorted(glob.glob(os.path.join(args.history, "device_tracking_log_*.json")))
+    if not files:
+        sys.exit(f"no device_tracking_log_*.json files in {args.history}")
+    routes = [Route.load(f) for f in files]
+    device_ids = [f"LOADTEST-BOX{i:05d}" for i in range(args.boxes)]
+
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        await wait_ready(client)
+        await seed(client, device_ids, routes, rng)
+
+        stats = Stats()
+        stop_at = time.monotonic() + args.duration
+        tasks = [
+            box_loop(client, stats, d, rng.choice(routes), args.interval, stop_at, random.Random(rng.random()),
+                     args.frame_points)
+            for d in device_ids
+        ]
+        tasks += [
+            reader_loop(client, stats, device_ids, args.reader_interval, stop_at, random.Random(rng.random()))
+            for _ in range(args.readers)
+        ]
+        print(f"{args.boxes} boxes, {args.readers} dashboard readers, {len(routes)} route(s), {args.duration}s")
+        t0 = time.monotonic()
+        await asyncio.gather(*tasks)
+        stats.report(time.monotonic() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="API to test (default: the server started with --start-server)")
+    parser.add_argument("--start-server", action="store_true", help="run a local uvicorn on a temporary database")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--boxes", type=int, default=1000)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--interval", type=float, default=5.0, help="firmware loop period in seconds")
+    parser.add_argument("--frame-points", type=int, default=0,
+                        help="send telemetry as binary frames of this many points (0: one JSON POST per point)")
+    parser.add_argument("--reader-interval", type=float, default=2.0)
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="folder with device_tracking_log_*.json")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        server = start_server(args.port, args.workers)
+        args.base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+    elif not args.base_url:
+        parser.error("pass --base-url or --start-server")
+
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Tests run against a scratch SQLite file; every test starts from empty tables.
+
+    cd Backend
+    python -m pytest -q      # needs pytest and httpx
+"""
+import os
+import tempfile
+
+# settings are read at import, so the environment has to be set before anything from app is imported
+_db_dir = tempfile.mkdtemp(prefix="geolockbox-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'geolockbox.db')}"
+os.environ["EVENT_BUS_URL"] = "local://"
+os.environ["LOG_DB_ENABLED"] = "false"
+
+import pytest
+from sqlmodel import Session, SQLModel
+
+from app.core.config import apply_timezone
+
+
+@pytest.fixture(scope="session")
+def engine():
+    import app.routes.routes  # noqa: F401  registers every model, as create_app() does before startup()
+    from app.core.database import engine
+    from app.services.log_service import ensure_log_search
+    from app.services.trajectory_service import ensure_spatial_index
+    from app.utils.helpers import create_db_and_tables
+
+    apply_timezone()
+    create_db_and_tables(engine)
+    ensure_log_search(engine)
+    ensure_spatial_index(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    from app.services.gps_service import gps_filter
+
+    with Session(engine) as session:
+        yield session
+    with engine.begin() as conn:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            conn.execute(table.delete())
+    gps_filter._tracks.clear()
+
+
+@pytest.fixture
+def client(session):
+    from fastapi.testclient import TestClient
+    from app.main import create_app
+
+    # not used as a context manager, so the background jobs of startup() never run
+    return TestClient(create_app())
@@ -0,0 +1,23 @@
+from app.core.config import ENV
+
+
+def login(client):
+    client.post("/auth/register", json={"username": "ops", "password": "secret", "email": "ops@example.com"})
+    r = client.post("/auth/login", json={"email": "ops@example.com", "password": "secret"})
+    return {"Authorization": f"Bearer {r.json()['token']}"}
+
+
+def test_profiling_is_not_sampled_by_default():
+    assert ENV.PROFILING_SAMPLE_RATE == 0
+
+
+def test_profiling_endpoints_need_a_login(client):
+    assert client.get("/admin/profiling").status_code == 401
+    assert client.put("/admin/profiling", json={"enabled": True}).status_code == 401
+    assert client.get("/admin/profiling/captures/1/profile").status_code == 401
+    assert client.get("/admin/profiling", headers={"Authorization": "Bearer not-a-token"}).status_code == 401
+
+    headers = login(client)
+    r = client.get("/admin/profiling", headers=headers)
+    assert r.status_code == 200 and r.json()["sample_rate"] == 0
+    assert client.get("/admin/profiling/captures", headers=headers).json() == []
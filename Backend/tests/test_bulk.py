@@ -0,0 +1,82 @@
+from sqlmodel import select
+
+from app.models.device import Device
+from app.models.log import Log
+
+
+def devices(session):
+    session.expire_all()
+    return {d.id: d for d in session.exec(select(Device))}
+
+
+def test_missing_field_keeps_value_and_null_clears_it(client, session):
+    r = client.post("/devices/bulk", json=[{"id": "B1", "name": "one", "status": "active", "battery_level": 80}])
+    assert r.json() == {"received": 1, "written": 1, "errors": []}
+
+    r = client.post("/devices/bulk", json=[{"id": "B1", "status": None, "battery_level": 70}])
+    assert r.json()["written"] == 1
+    stored = devices(session)["B1"]
+    assert (stored.name, stored.status, stored.battery_level) == ("one", None, 70)
+
+
+def test_csv_empty_cell_keeps_value(client, session):
+    client.post("/devices/bulk", json=[{"id": "B1", "name": "one", "battery_level": 80}])
+    r = client.post("/devices/bulk", content=b"id,name,battery_level\nB1,,50\nB2,two,\n", headers={"content-type": "text/csv"})
+    assert r.json() == {"received": 2, "written": 2, "errors": []}
+    stored = devices(session)
+    assert (stored["B1"].name, stored["B1"].battery_level) == ("one", 50)
+    assert (stored["B2"].name, stored["B2"].battery_level) == ("two", None)
+
+
+def test_invalid_utf8_csv_is_a_bad_request(client):
+    r = client.post("/devices/bulk", content="id,name\nB1,caf\xe9\n".encode("latin-1"), headers={"content-type": "text/csv"})
+    assert r.status_code == 400
+
+
+def test_invalid_rows_are_reported_and_the_rest_written(client, session):
+    r = client.post("/devices/bulk", json=[
+        {"id": "B1", "battery_level": 2 ** 70},
+        {"id": "B2", "name": "ok"},
+        {"id": 3},
+        "not an object",
+    ])
+    body = r.json()
+    assert r.status_code == 200 and body["written"] == 1
+    assert [(e["index"], e["id"]) for e in body["errors"]] == [(0, "B1"), (2, "3"), (3, None)]
+    assert body["errors"][0]["errors"] == ["battery_level: Integer out of range"]
+    assert set(devices(session)) == {"B2"}
+
+
+def test_rows_the_database_rejects_are_reported(client, session, engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE UNIQUE INDEX ux_test_device_name ON device(name)")
+    try:
+        r = client.post("/devices/bulk", json=[{"id": "B1", "name": "a"}, {"id": "B2", "name": "a"}, {"id": "B3", "name": "b"}])
+    finally:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ux_test_device_name")
+    body = r.json()
+    assert body["written"] == 2
+    assert [(e["index"], e["id"]) for e in body["errors"]] == [(1, "B2")]
+    assert set(devices(session)) == {"B1", "B3"}
+
+
+def test_repeated_id_is_merged_in_order_and_counted_once(client, session):
+    r = client.post("/devices/bulk", json=[
+        {"id": "B1", "name": "first", "status": "active"},
+        {"id": "B1", "name": None, "battery_level": 10},
+        {"id": "B1", "name": "last"},
+    ])
+    assert r.json() == {"received": 3, "written": 1, "errors": []}
+    stored = devices(session)["B1"]
+    assert (stored.name, stored.status, stored.battery_level) == ("last", "active", 10)
+
+
+def test_logs_bulk_upserts_by_id(client, session):
+    client.post("/logs/bulk", json=[{"id": "LOG-1", "level": "INFO", "message": "one", "extra": {"a": 1}}])
+    r = client.post("/logs/bulk", json=[{"id": "LOG-1", "extra": None}, {"level": "WARNING", "message": "two"}])
+    assert r.json()["written"] == 2
+    session.expire_all()
+    log = session.get(Log, "LOG-1")
+    assert (log.message, log.extra) == ("one", None)
+    assert len(session.exec(select(Log)).all()) == 2
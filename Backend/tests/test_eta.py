@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from math import pi
+
+from sqlalchemy import event
+
+from app.core.config import ENV
+from app.models.delivery import Delivery
+from app.models.device import Device
+from app.models.telemetry import Telemetry
+from app.services.eta_service import _active_deliveries, compute_etas
+from app.utils.helpers import generate_id
+
+DEST = (-19.9, -44.0)
+DEGREE_M = 6371000 * pi / 180
+
+
+def test_eta_from_recent_speed(session, monkeypatch):
+    monkeypatch.setattr(ENV, "ETA_ROUTE_FACTOR", 1.5)
+    now = datetime(2025, 1, 1, 8)
+    session.add(Delivery(id="DEL-1", status="in_transit", device_id="BOX-1", dest_lat=DEST[0], dest_lon=DEST[1]))
+    session.add(Device(id="BOX-1"))
+    # 9 km straight north of the destination, driving at 60 km/h
+    session.add(Telemetry(id=generate_id("TEL"), device_id="BOX-1", latitude=DEST[0] + 9000 / DEGREE_M,
+                          longitude=DEST[1], speed=60, timestamp=now - timedelta(minutes=1)))
+    session.commit()
+
+    etas = compute_etas(session, session.execute(_active_deliveries()).all(), now=now)
+
+    # 9 km * 1.5 at 1 km/min, rounded up
+    assert etas == {"DEL-1": 14}
+
+
+def test_only_devices_of_given_deliveries_are_read(session, engine):
+    for i in range(3):
+        session.add(Delivery(id=f"DEL-{i}", status="in_transit", device_id=f"BOX-{i}", dest_lat=DEST[0], dest_lon=DEST[1]))
+        session.add(Device(id=f"BOX-{i}", latitude=DEST[0], longitude=DEST[1]))
+    session.commit()
+    subset = session.execute(_active_deliveries().where(Delivery.id == "DEL-1")).all()
+
+    params = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: params.append(parameters)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        etas = compute_etas(session, subset)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert etas == {"DEL-1": 0}
+    bound = {p for parameters in params for p in parameters if isinstance(p, str)}
+    assert "BOX-1" in bound and not bound & {"BOX-0", "BOX-2"}
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from math import pi
+
+import pytest
+
+from app.services.geofence_service import DWELL, ENTER, EXIT, GeofenceDetector
+from app.services.lock_services import LockTarget
+
+START = datetime(2025, 1, 1, 8)
+DEST = (-19.9, -44.0)
+DEGREE_M = 6371000 * pi / 180
+TARGET = LockTarget("DEL-1", DEST[0], DEST[1], 100.0)
+
+
+def feed(detector, seconds, distance_m, target=TARGET):
+    return detector.evaluate(
+        "BOX", target, DEST[0] + distance_m / DEGREE_M, DEST[1], START + timedelta(seconds=seconds)
+    )
+
+
+def kinds(events):
+    return [e["type"] for e in events]
+
+
+@pytest.fixture
+def detector():
+    return GeofenceDetector(hysteresis_m=20, confirm_seconds=10, dwell_seconds=60)
+
+
+def test_enter_is_confirmed_after_confirm_seconds(detector):
+    assert feed(detector, 0, 500) == []
+    # inside, but not held long enough yet
+    assert feed(detector, 10, 90) == []
+    assert feed(detector, 15, 80) == []
+    events = feed(detector, 20, 70)
+    assert kinds(events) == [ENTER]
+    # the event carries the first point of the crossing and its real distance
+    assert events[0]["timestamp"] == START + timedelta(seconds=10)
+    assert events[0]["distance_m"] == pytest.approx(90, abs=0.1)
+    assert feed(detector, 25, 70) == []
+
+
+def test_short_crossing_is_not_an_event(detector):
+    feed(detector, 0, 500)
+    assert feed(detector, 10, 90) == []
+    assert feed(detector, 15, 150) == []
+    assert feed(detector, 30, 150) == []
+
+
+def test_dwell_after_dwell_seconds_inside(detector):
+    feed(detector, 0, 50)
+    assert kinds(feed(detector, 10, 50)) == [ENTER]
+    assert feed(detector, 50, 50) == []
+    assert kinds(feed(detector, 60, 50)) == [DWELL]
+    assert feed(detector, 120, 50) == []
+
+
+def test_exit_needs_radius_plus_hysteresis(detector):
+    feed(detector, 0, 50)
+    feed(detector, 10, 50)
+    # 110 m is past the radius but inside the hysteresis band
+    assert feed(detector, 20, 110) == []
+    assert feed(detector, 40, 110) == []
+    assert feed(detector, 50, 130) == []
+    events = feed(detector, 60, 140)
+    assert kinds(events) == [EXIT]
+    assert events[0]["timestamp"] == START + timedelta(seconds=50)
+    assert events[0]["distance_m"] == pytest.approx(130, abs=0.1)
+
+
+def test_new_delivery_starts_over(detector):
+    feed(detector, 0, 50)
+    assert kinds(feed(detector, 10, 50)) == [ENTER]
+    other = LockTarget("DEL-2", DEST[0], DEST[1], 100.0)
+    assert feed(detector, 20, 50, other) == []
+    assert kinds(feed(detector, 30, 50, other)) == [ENTER]
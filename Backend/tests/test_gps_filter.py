@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from math import pi
+
+from app.services.gps_service import ACCEPTED, DUPLICATE, LATE, OUTLIER, RESET_AFTER_REJECTS, GpsFilter
+
+START = datetime(2025, 1, 1, 8)
+ORIGIN = (-19.9, -44.0)
+DEGREE_M = 6371000 * pi / 180
+
+
+def at(seconds, north_m=0.0):
+    return ORIGIN[0] + north_m / DEGREE_M, ORIGIN[1], START + timedelta(seconds=seconds)
+
+
+def status(gps, seconds, north_m=0.0, device_id="BOX"):
+    return gps.process(device_id, *at(seconds, north_m)).status
+
+
+def test_rejects_jump_faster_than_max_speed():
+    gps = GpsFilter(max_speed_kmh=180, accuracy_m=10)
+    assert status(gps, 0) == ACCEPTED
+    # 833 m in 10 s is 300 km/h
+    assert status(gps, 10, 833) == OUTLIER
+    # 400 m in 10 s is 144 km/h (minus the accuracy margin)
+    assert status(gps, 10, 400) == ACCEPTED
+
+
+def test_jitter_within_accuracy_is_accepted():
+    gps = GpsFilter(max_speed_kmh=5, accuracy_m=10)
+    assert status(gps, 0) == ACCEPTED
+    assert status(gps, 1, 19) == ACCEPTED
+    assert status(gps, 2, 19 + 25) == OUTLIER
+
+
+def test_retry_of_outlier_does_not_count():
+    gps = GpsFilter(max_speed_kmh=180)
+    status(gps, 0)
+    far = at(10, 5000)
+    assert gps.process("BOX", *far).status == OUTLIER
+    assert gps.process("BOX", *far).status == OUTLIER
+    assert gps.process("BOX", *far).status == OUTLIER
+    # the same rejected point sent three times is still one outlier, no reset
+    assert status(gps, 20) == ACCEPTED
+
+
+def test_resets_after_agreeing_outliers():
+    gps = GpsFilter(max_speed_kmh=180)
+    assert status(gps, 0) == ACCEPTED
+    # the box was really 5 km away: consistent points there
+    results = [status(gps, 10 * i, 5000 + 50 * i) for i in range(1, RESET_AFTER_REJECTS + 1)]
+    assert results == [OUTLIER] * (RESET_AFTER_REJECTS - 1) + [ACCEPTED]
+    # the new anchor sticks, the old position is now the outlier
+    assert status(gps, 10 * (RESET_AFTER_REJECTS + 1), 5000 + 50 * (RESET_AFTER_REJECTS + 1)) == ACCEPTED
+    assert status(gps, 10 * (RESET_AFTER_REJECTS + 2)) == OUTLIER
+
+
+def test_scattered_outliers_do_not_reset():
+    gps = GpsFilter(max_speed_kmh=180)
+    status(gps, 0)
+    # far away, but far from each other too
+    assert [status(gps, 10 * i, 5000 * i) for i in range(1, RESET_AFTER_REJECTS + 2)] == [OUTLIER] * (RESET_AFTER_REJECTS + 1)
+    assert status(gps, 100, 100) == ACCEPTED
+
+
+def test_reordering_is_bounded_by_window():
+    gps = GpsFilter(reorder_size=3)
+    for s in (10, 20, 30):
+        assert status(gps, s, s) == ACCEPTED
+    # older than the newest point but inside the window
+    assert status(gps, 25, 25) == ACCEPTED
+    # the window now holds 20, 25, 30: anything before 20 is too late to place
+    assert status(gps, 15, 15) == LATE
+    assert status(gps, 5, 5) == LATE
+
+
+def test_duplicate_key_returns_bound_row():
+    gps = GpsFilter()
+    assert status(gps, 0) == ACCEPTED
+    result = gps.process("BOX", *at(0), key="k1")
+    assert result.status == ACCEPTED
+    gps.bind("BOX", "k1", "TEL-1")
+    again = gps.process("BOX", *at(0), key="k1")
+    assert (again.status, again.telemetry_id) == (DUPLICATE, "TEL-1")
+    # keys are per device
+    assert gps.process("OTHER", *at(0), key="k1").status == ACCEPTED
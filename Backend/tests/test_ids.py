@@ -0,0 +1,107 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from app.utils import helpers
+from app.utils.helpers import _CROCKFORD, _RANDOM_BITS, generate_id, new_ulid
+
+AT = datetime(2025, 1, 1, 8, 0, 0, 123000)
+
+
+def decode(ulid):
+    value = 0
+    for char in ulid:
+        value = value * 32 + _CROCKFORD.index(char)
+    return value >> _RANDOM_BITS, value & ((1 << _RANDOM_BITS) - 1)
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    ms = 1_735_718_400_000
+    monkeypatch.setattr(helpers.time, "time_ns", lambda: ms * 1_000_000)
+    helpers._reset_ulid_state()
+    yield ms
+    helpers._reset_ulid_state()
+
+
+def test_format():
+    ulid = new_ulid()
+    assert len(ulid) == 26
+    assert set(ulid) <= set(_CROCKFORD)
+    assert generate_id("TEL").startswith("TEL-")
+
+
+def test_monotonic_within_one_millisecond(frozen_clock):
+    ids = [new_ulid() for _ in range(1000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 1000
+    assert {decode(u)[0] for u in ids} == {frozen_clock}
+    # consecutive IDs of one millisecond differ by one in the random part
+    randoms = [decode(u)[1] for u in ids]
+    assert [b - a for a, b in zip(randoms, randoms[1:])] == [1] * 999
+
+
+def test_clock_going_back_keeps_order(frozen_clock, monkeypatch):
+    first = new_ulid()
+    monkeypatch.setattr(helpers.time, "time_ns", lambda: (frozen_clock - 5) * 1_000_000)
+    second = new_ulid()
+    assert second > first
+    assert decode(second)[0] == frozen_clock
+
+
+def test_random_part_overflow_moves_to_next_millisecond(frozen_clock):
+    new_ulid()
+    helpers._last_random = (1 << _RANDOM_BITS) - 1
+    ms, _ = decode(new_ulid())
+    assert ms == frozen_clock + 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_state_is_reset_in_forked_child(frozen_clock):
+    new_ulid()
+    assert helpers._last_ms == frozen_clock
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_end)
+            os.write(write_end, f"{helpers._last_ms} {helpers._last_random}".encode())
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as f:
+        state = f.read()
+    os.waitpid(pid, 0)
+    assert state == "0 0"
+    # the parent keeps counting where it was
+    assert helpers._last_ms == frozen_clock
+
+
+def test_key_gives_deterministic_id():
+    assert new_ulid("BOX1|42", AT) == new_ulid("BOX1|42", AT)
+    assert new_ulid("BOX1|42", AT) != new_ulid("BOX1|43", AT)
+    assert new_ulid("BOX2|42", AT) != new_ulid("BOX1|42", AT)
+    ms, _ = decode(new_ulid("BOX1|42", AT))
+    assert ms == int(AT.timestamp() * 1000)
+    # keyed IDs still sort by the point's time
+    assert new_ulid("zzz", AT) < new_ulid("aaa", datetime(2025, 1, 1, 8, 0, 1))
+
+
+def test_idempotency_key_retry_returns_stored_point(client):
+    body = {"device_id": "BOX1", "latitude": -19.9, "longitude": -44.0, "timestamp": "2025-01-01T08:00:00"}
+    headers = {"Idempotency-Key": "boot-7-seq-12"}
+
+    first = client.post("/telemetry", json=body, headers=headers)
+    assert first.status_code == 201
+    assert first.json()["id"] == generate_id("TEL", key="BOX1|boot-7-seq-12", at=datetime(2025, 1, 1, 8))
+
+    retry = client.post("/telemetry", json=body, headers=headers)
+    assert retry.status_code == 200
+    assert retry.json()["id"] == first.json()["id"]
+    assert len(client.get("/telemetry", params={"device_id": "BOX1"}).json()) == 1
+
+    other = client.post("/telemetry", json=body, headers={"Idempotency-Key": "boot-7-seq-13"})
+    assert other.status_code == 201
+    assert other.json()["id"] != first.json()["id"]
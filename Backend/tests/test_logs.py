@@ -0,0 +1,114 @@
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import log_handler
+from app.core.log_handler import DatabaseLogHandler, RateLimiter
+from app.models.log import Log
+from app.services.log_service import search_logs
+
+START = datetime(2025, 1, 1, 8)
+
+
+def add_logs(session, *messages, level="INFO"):
+    for i, message in enumerate(messages):
+        session.add(Log(id=f"LOG-{i:04d}", level=level, message=message, timestamp=START + timedelta(seconds=i // 2)))
+    session.commit()
+
+
+def record(msg, *args, created=0.0, name="app.test", **extra):
+    rec = logging.LogRecord(name, logging.INFO, __file__, 1, msg, args, None)
+    rec.created = created
+    for key, value in extra.items():
+        setattr(rec, key, value)
+    return rec
+
+
+def test_keyset_pages_cover_every_row_once(session):
+    # pairs of rows share a timestamp, so pages have to break ties by id
+    add_logs(session, *[f"message {i}" for i in range(25)])
+    session.add(Log(id="LOG-NOTS", level="INFO", message="no timestamp"))
+    session.commit()
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = search_logs(session, cursor=cursor, limit=4)
+        seen.extend(r.id for r in rows)
+        if cursor is None:
+            break
+    expected = sorted((f"LOG-{i:04d}" for i in range(25)), key=lambda i: (int(i[4:]) // 2, i), reverse=True)
+    assert seen == expected + ["LOG-NOTS"]
+
+
+def test_full_text_search_with_filters(session):
+    add_logs(session, "box BOX-1 unlocked", "box BOX-2 locked", "telemetry rejected", "unlock failed")
+    session.add(Log(id="LOG-WARN", level="WARNING", message="box BOX-3 unlocked", timestamp=START))
+    session.commit()
+
+    assert {r.id for r in search_logs(session, q="unlocked")[0]} == {"LOG-0000", "LOG-WARN"}
+    assert {r.id for r in search_logs(session, q="unlock*")[0]} == {"LOG-0000", "LOG-0003", "LOG-WARN"}
+    assert [r.id for r in search_logs(session, q="unlocked", levels=["warning"])[0]] == ["LOG-WARN"]
+    # FTS5 syntax in the input is taken literally
+    assert search_logs(session, q='"box" OR')[0] == []
+
+
+def test_full_text_index_follows_vacuum(session, engine):
+    add_logs(session, "first", "second", "third")
+    session.delete(session.get(Log, "LOG-0000"))
+    session.commit()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+    assert [r.id for r in search_logs(session, q="third")[0]] == ["LOG-0002"]
+
+
+def test_rate_limiter_counts_suppressed_records():
+    limiter = RateLimiter(per_minute=2)
+    assert limiter.allow(record("door %s", "A")) == 0
+    # same template with other arguments shares the window
+    assert limiter.allow(record("door %s", "B")) == 0
+    assert limiter.allow(record("door %s", "C")) is None
+    assert limiter.allow(record("door %s", "D")) is None
+    assert limiter.allow(record("other")) == 0
+    # next minute: let through and report what was dropped
+    assert limiter.allow(record("door %s", "E", created=60.0)) == 2
+    assert limiter.allow(record("door %s", "F", created=60.0)) == 0
+
+
+def test_rate_limiter_is_bounded(monkeypatch):
+    monkeypatch.setattr(log_handler, "_MAX_TEMPLATES", 3)
+    limiter = RateLimiter(per_minute=1)
+    for i in range(5):
+        limiter.allow(record(f"template {i}"))
+    assert list(limiter._windows) == [("app.test", f"template {i}") for i in (2, 3, 4)]
+
+
+@pytest.fixture
+def handler(engine):
+    handler = DatabaseLogHandler(engine, rate_limit_per_minute=3, flush_seconds=0.05, exclude=("sqlalchemy",))
+    yield handler
+    handler.stop()
+
+
+def test_handler_samples_and_limits(handler, session, monkeypatch):
+    values = iter([0.05, 0.5])
+    monkeypatch.setattr(log_handler.random, "random", lambda: next(values))
+    handler.emit(record("kept", sample=0.1))
+    handler.emit(record("sampled out", sample=0.1))
+    for i in range(5):
+        handler.emit(record("noisy %d", i))
+    handler.emit(record("excluded", name="sqlalchemy.engine"))
+    handler.emit(record("noisy %d", 5, created=60.0))
+
+    rows = [handler._queue.get_nowait() for _ in range(handler.queued())]
+    assert [r["message"] for r in rows] == ["kept", "noisy 0", "noisy 1", "noisy 2", "noisy 5"]
+    assert rows[-1]["extra"]["suppressed"] == 2
+
+
+def test_handler_writes_batches(handler, session):
+    handler.start()
+    for i in range(3):
+        handler.emit(record("written %d", i, created=START.timestamp()))
+    handler.stop()
+    assert handler.written == 3
+    assert sorted(r.message for r in search_logs(session, q="written")[0]) == ["written 0", "written 1", "written 2"]
@@ -0,0 +1,55 @@
+import re
+
+from app.core.metrics import UNMATCHED_ROUTE
+
+SAMPLE = re.compile(r"^(\w+)\{(.*)\} (\S+)$")
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    samples = {}
+    for line in response.text.splitlines():
+        match = SAMPLE.match(line)
+        if match:
+            name, labels, value = match.groups()
+            samples[(name, labels)] = float(value)
+    return samples
+
+
+def delta(before, after, name, labels):
+    return after.get((name, labels), 0) - before.get((name, labels), 0)
+
+
+def test_requests_are_labelled_by_route_template(client):
+    before = scrape(client)
+    for device_id in ("BOX1", "BOX2", "BOX3"):
+        assert client.get(f"/devices/{device_id}").status_code == 404
+    assert client.get("/no/such/path").status_code == 404
+    after = scrape(client)
+
+    route = 'method="GET",route="/devices/{device_id}"'
+    assert delta(before, after, "geolockbox_http_requests_total", route + ',status="404"') == 3
+    assert delta(before, after, "geolockbox_http_request_duration_seconds_count", route) == 3
+    assert delta(before, after, "geolockbox_http_requests_total",
+                 f'method="GET",route="{UNMATCHED_ROUTE}",status="404"') == 1
+    # the raw paths never become labels
+    assert not any("BOX1" in labels or "/no/such/path" in labels for _, labels in after)
+
+
+def test_sql_statements_are_counted_per_request(client):
+    before = scrape(client)
+    client.get("/devices/BOX1")
+    assert client.get("/").status_code == 200
+    after = scrape(client)
+
+    lookup = 'method="GET",route="/devices/{device_id}"'
+    assert delta(before, after, "geolockbox_sql_statements_per_request_count", lookup) == 1
+    # the device lookup runs at least one SELECT
+    assert delta(before, after, "geolockbox_sql_statements_per_request_sum", lookup) >= 1
+    assert delta(before, after, "geolockbox_sql_duration_seconds_per_request_sum", lookup) > 0
+
+    root = 'method="GET",route="/"'
+    assert delta(before, after, "geolockbox_sql_statements_per_request_count", root) == 1
+    assert delta(before, after, "geolockbox_sql_statements_per_request_sum", root) == 0
@@ -0,0 +1,79 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, create_engine, select
+
+from app.models.telemetry import Telemetry
+from app.models.telemetry_rollup import TelemetryRollup
+from app.services.retention_service import MINUTE, prune, rollup
+from app.utils.helpers import create_db_and_tables, generate_id
+
+
+def add_point(session, timestamp, speed=10.0):
+    session.add(Telemetry(id=generate_id("TEL"), device_id="BOX", latitude=-19.9, longitude=-44.0,
+                          speed=speed, timestamp=timestamp))
+    session.commit()
+
+
+def minute_bucket(session, start):
+    return session.exec(select(TelemetryRollup).where(
+        TelemetryRollup.resolution == MINUTE, TelemetryRollup.bucket_start == start
+    )).one()
+
+
+def test_late_point_after_pruning_newest_row_is_rolled_up(session):
+    # old enough for raw retention to delete it right after the rollup
+    bucket = (datetime.now() - timedelta(days=30)).replace(second=0, microsecond=0)
+    for s in range(6):
+        add_point(session, bucket + timedelta(seconds=s))
+    rollup(session)
+    prune(session)
+    session.commit()
+    assert session.exec(select(Telemetry)).all() == []
+    assert minute_bucket(session, bucket).count == 6
+
+    # a late upload for the same minute, inserted after the newest row was deleted
+    add_point(session, bucket + timedelta(seconds=30), speed=40.0)
+    assert prune(session)[0] == 0
+    rollup(session)
+    prune(session)
+    session.commit()
+
+    merged = minute_bucket(session, bucket)
+    assert merged.count == 7
+    assert merged.speed_max == 40.0
+    assert session.exec(select(Telemetry)).all() == []
+
+
+def test_rollup_is_incremental(session):
+    bucket = datetime(2025, 1, 1, 8)
+    add_point(session, bucket, speed=10.0)
+    rollup(session)
+    add_point(session, bucket + timedelta(seconds=20), speed=30.0)
+    assert rollup(session)[MINUTE] == 1
+    assert rollup(session)[MINUTE] == 0
+    session.commit()
+
+    merged = minute_bucket(session, bucket)
+    assert (merged.count, merged.speed_min, merged.speed_max, merged.speed_avg) == (2, 10.0, 30.0, 20.0)
+
+
+def test_sequence_column_is_added_with_existing_rowids(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE telemetry (id VARCHAR NOT NULL PRIMARY KEY, device_id VARCHAR, latitude FLOAT, "
+                 "longitude FLOAT, speed FLOAT, battery_level INTEGER, timestamp DATETIME)")
+    conn.executemany("INSERT INTO telemetry (rowid, id, device_id, timestamp) VALUES (?, ?, 'BOX', '2025-01-01 08:00:00')",
+                     [(5, "TEL-A"), (9, "TEL-B")])
+    conn.commit()
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{path}")
+    create_db_and_tables(engine)
+    create_db_and_tables(engine)
+    with Session(engine) as session:
+        assert [(t.seq, t.id) for t in session.exec(select(Telemetry).order_by(Telemetry.seq))] == [(5, "TEL-A"), (9, "TEL-B")]
+        session.add(Telemetry(id="TEL-C", device_id="BOX"))
+        session.commit()
+        assert session.get(Telemetry, "TEL-C").seq == 10
+    engine.dispose()
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from math import pi
+
+import pytest
+from sqlmodel import select
+
+from app.core.config import ENV
+from app.models.telemetry import Telemetry
+from app.services.lock_services import haversine_distance
+from app.services.retention_service import MINUTE, RAW, prune, rollup
+from app.services.trajectory_service import position_at, query_box, query_radius
+from app.utils.helpers import generate_id
+
+CENTER = (-23.55, -46.63)
+DEGREE_M = 6371000 * pi / 180  # along a meridian
+
+
+def add_points(session, *points):
+    for device_id, latitude, longitude, timestamp in points:
+        session.add(Telemetry(
+            id=generate_id("TEL"), device_id=device_id, latitude=latitude, longitude=longitude, timestamp=timestamp,
+        ))
+    session.commit()
+
+
+def north_of(meters):
+    return CENTER[0] + meters / DEGREE_M, CENTER[1]
+
+
+def test_haversine_distance():
+    # one degree of latitude on a 6371 km sphere
+    assert haversine_distance(0, 0, 1, 0) == pytest.approx(DEGREE_M)
+    assert haversine_distance(*CENTER, *north_of(127)) == pytest.approx(127)
+    assert haversine_distance(*CENTER, *CENTER) == 0
+
+
+def test_query_radius_boundary(session):
+    now = datetime.now().replace(microsecond=0)
+    add_points(
+        session,
+        ("INSIDE", *north_of(90), now),
+        ("OUTSIDE", *north_of(127), now),
+        ("EDGE", *north_of(99.5), now),
+    )
+
+    found = query_radius(session, *CENTER, 100, now - timedelta(minutes=1), now + timedelta(minutes=1))
+
+    assert [d["device_id"] for d in found] == ["INSIDE", "EDGE"]
+    assert found[0]["min_distance_m"] == pytest.approx(90, abs=0.2)
+    assert found[1]["min_distance_m"] == pytest.approx(99.5, abs=0.2)
+
+
+def test_query_box_filters_area_time_and_device(session):
+    now = datetime.now().replace(microsecond=0)
+    add_points(
+        session,
+        ("A", *north_of(50), now - timedelta(minutes=5)),
+        ("A", *north_of(50), now - timedelta(minutes=1)),
+        ("B", *north_of(60), now - timedelta(minutes=2)),
+        ("B", *north_of(5000), now - timedelta(minutes=2)),
+        ("A", *north_of(50), now - timedelta(hours=2)),
+    )
+    box = (CENTER[0], CENTER[1] - 0.001, CENTER[0] + 0.001, CENTER[1] + 0.001)
+    start, end = now - timedelta(minutes=10), now
+
+    points = query_box(session, *box, start, end)
+    assert [(p["device_id"], p["timestamp"]) for p in points] == [
+        ("A", now - timedelta(minutes=5)), ("B", now - timedelta(minutes=2)), ("A", now - timedelta(minutes=1)),
+    ]
+    assert [p["device_id"] for p in query_box(session, *box, start, end, device_id="B")] == ["B"]
+    assert len(query_box(session, *box, start, end, limit=1)) == 1
+
+
+def test_spatial_index_survives_delete_and_vacuum(session, engine):
+    now = datetime.now().replace(microsecond=0)
+    add_points(session, *[("A", *north_of(10 * i), now) for i in range(5)])
+    newest = session.exec(select(Telemetry).order_by(Telemetry.seq.desc())).first()
+    session.delete(newest)
+    session.commit()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+    add_points(session, ("LATE", *north_of(1000), now))
+
+    box = (CENTER[0] - 0.001, CENTER[1] - 0.001, CENTER[0] + 0.001, CENTER[1] + 0.001)
+    found = query_box(session, *box, now - timedelta(minutes=1), now + timedelta(minutes=1))
+    assert sorted(p["latitude"] for p in found) == [north_of(10 * i)[0] for i in range(4)]
+
+
+def test_position_at_interpolates_between_points(session):
+    t0 = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+    add_points(session, ("A", *north_of(0), t0), ("A", *north_of(100), t0 + timedelta(seconds=10)))
+
+    pos = position_at(session, "A", t0 + timedelta(seconds=4), timedelta(minutes=5))
+    assert pos["interpolated"] and pos["resolution"] == RAW
+    assert pos["latitude"] == pytest.approx(north_of(40)[0])
+    assert pos["before"].timestamp == t0
+
+    # only one side within max_gap: that point as is
+    pos = position_at(session, "A", t0 + timedelta(seconds=70), timedelta(minutes=1))
+    assert not pos["interpolated"] and pos["latitude"] == north_of(100)[0]
+    assert position_at(session, "A", t0 + timedelta(hours=1), timedelta(minutes=1)) is None
+
+
+def test_position_at_past_raw_retention_uses_rollups(session):
+    t0 = (datetime.now() - timedelta(days=ENV.TELEMETRY_RAW_RETENTION_DAYS + 3)).replace(second=0, microsecond=0)
+    add_points(session, ("A", *north_of(0), t0 + timedelta(seconds=50)), ("A", *north_of(100), t0 + timedelta(seconds=110)))
+    rollup(session)
+    prune(session)
+    session.commit()
+    assert session.exec(select(Telemetry)).all() == []
+
+    pos = position_at(session, "A", t0 + timedelta(seconds=80), timedelta(minutes=1))
+    assert pos["resolution"] == MINUTE and pos["interpolated"]
+    assert pos["latitude"] == pytest.approx(north_of(50)[0])
+    assert pos["before"] is None
+
+
+def test_area_queries_before_raw_retention_are_gone(client):
+    start = datetime.now() - timedelta(days=ENV.TELEMETRY_RAW_RETENTION_DAYS + 1)
+    window = {"start": start.isoformat(), "end": (start + timedelta(hours=1)).isoformat()}
+
+    r = client.get("/trajectory/near", params={"lat": CENTER[0], "lon": CENTER[1], "radius_m": 100, **window})
+    assert r.status_code == 410 and "/telemetry/history" in r.json()["detail"]
+    r = client.get("/trajectory/bbox", params={"min_lat": -24, "min_lon": -47, "max_lat": -23, "max_lon": -46, **window})
+    assert r.status_code == 410
+
+    recent = {"start": datetime.now().isoformat(), "end": (datetime.now() + timedelta(hours=1)).isoformat()}
+    r = client.get("/trajectory/bbox", params={"min_lat": -24, "min_lon": -47, "max_lat": -23, "max_lon": -46, **recent})
+    assert r.status_code == 200 and r.json() == []
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+
+from app.models.telemetry import Telemetry
+from app.services.wire_service import (
+    CONTENT_TYPE, COUNT, HEADER, MAGIC, RECORD, RECORD_INTERVAL, decode_frames, encode_frame, ingest_frames,
+)
+
+START = datetime(2025, 1, 1, 8)
+
+
+def track(n, start=START):
+    # a few metres apart, well inside the GPS filter's speed limit
+    return [(start + i * RECORD_INTERVAL if start else None, -19.9 + i * 1e-5, -44.0, 36.5, 80) for i in range(n)]
+
+
+def post(client, body, content_type=CONTENT_TYPE):
+    return client.post("/telemetry/frames", content=body, headers={"Content-Type": content_type})
+
+
+def test_decode_round_trip():
+    body = encode_frame("BOX1", track(3)) + encode_frame("BOX2", [(START, 1.5, -2.25, None, None)])
+    frames = decode_frames(body)
+    assert [(device_id, len(records)) for device_id, records in frames] == [("BOX1", 3), ("BOX2", 1)]
+    epoch, lat, lon, speed, battery, flags = frames[1][1][0]
+    assert (epoch, lat, lon, speed, battery, flags) == (int(START.timestamp()), 15000000, -22500000, 0xFFFF, 0xFF, 0)
+
+
+@pytest.mark.parametrize("body", [
+    pytest.param(b"G", id="header cut short"),
+    pytest.param(b"XX" + encode_frame("BOX1", track(1))[2:], id="bad magic"),
+    pytest.param(HEADER.pack(MAGIC, 2, 4) + b"BOX1" + COUNT.pack(0), id="unknown version"),
+    pytest.param(HEADER.pack(MAGIC, 1, 10) + b"BOX1", id="device id cut short"),
+    pytest.param(HEADER.pack(MAGIC, 1, 4) + b"BOX\xff" + COUNT.pack(0), id="non-ascii device id"),
+    pytest.param(HEADER.pack(MAGIC, 1, 0) + COUNT.pack(0), id="empty device id"),
+    pytest.param(encode_frame("BOX1", track(3))[:-1], id="records cut short"),
+    pytest.param(encode_frame("BOX1", track(2)) + b"\x00", id="trailing byte"),
+])
+def test_malformed_frames_are_rejected(body):
+    with pytest.raises(HTTPException) as exc:
+        decode_frames(body)
+    assert exc.value.status_code == 400
+
+
+def test_broken_frame_rejects_whole_request(client, session):
+    body = encode_frame("BOX1", track(3)) + encode_frame("BOX2", track(3))[:-RECORD.size]
+    response = post(client, body)
+    assert response.status_code == 400
+    assert session.exec(select(Telemetry)).all() == []
+
+
+def test_wrong_content_type(client):
+    assert post(client, encode_frame("BOX1", track(1)), "application/json").status_code == 415
+
+
+def test_frames_are_stored_over_http(client, session):
+    body = encode_frame("BOX1", track(12)) + encode_frame("BOX2", track(12))
+    response = post(client, body)
+    assert response.status_code == 200
+    assert response.json() == {"frames": 2, "received": 24, "written": 24, "duplicates": 0, "rejected": 0}
+    rows = session.exec(select(Telemetry).where(Telemetry.device_id == "BOX1").order_by(Telemetry.timestamp)).all()
+    assert [r.timestamp for r in rows] == [START + i * RECORD_INTERVAL for i in range(12)]
+    assert rows[0].speed == pytest.approx(36.5)
+    assert rows[0].battery_level == 80
+
+
+def test_resent_frame_is_not_stored_twice(client):
+    body = encode_frame("BOX1", track(5))
+    assert post(client, body).json()["written"] == 5
+    assert post(client, body).json() == {"frames": 1, "received": 5, "written": 0, "duplicates": 5, "rejected": 0}
+
+
+def test_records_without_time_are_spread_over_the_body(session):
+    before = datetime.now().replace(microsecond=0)
+    body = encode_frame("BOX1", track(4, start=None)) + encode_frame("BOX1", track(2, start=None))
+    result = ingest_frames(session, body)
+    assert result.written == 6
+
+    rows = session.exec(select(Telemetry).order_by(Telemetry.seq)).all()
+    stamps = [r.timestamp for r in rows]
+    # in order, one firmware interval apart, the last one at the receive time
+    assert len(set(stamps)) == 6
+    assert [b - a for a, b in zip(stamps, stamps[1:])] == [RECORD_INTERVAL] * 5
+    assert before <= stamps[-1] <= datetime.now() + timedelta(seconds=1)
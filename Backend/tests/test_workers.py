@@ -0,0 +1,91 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import leader
+from app.core.events import UnixSocketBus
+from app.core.worker import PeriodicWorker
+from app.services.gps_service import ACCEPTED, DUPLICATE, OUTLIER, GpsFilter
+
+needs_unix = pytest.mark.skipif(not hasattr(socket, "AF_UNIX") or leader.fcntl is None, reason="unix sockets and flock")
+
+
+@needs_unix
+def test_unix_bus_delivers_to_peers(tmp_path):
+    a, b = UnixSocketBus(str(tmp_path)), UnixSocketBus(str(tmp_path))
+    got = threading.Event()
+    b.subscribe("device.changed", lambda payload: got.set())
+    a.start()
+    b.start()
+    try:
+        a.publish("device.changed", {"id": "BOX", "op": "update"})
+        assert got.wait(2)
+    finally:
+        a.stop()
+        b.stop()
+
+
+@needs_unix
+def test_unix_bus_never_waits_for_a_stuck_peer(tmp_path):
+    stuck = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    stuck.bind(str(tmp_path / "stuck.sock"))
+    bus = UnixSocketBus(str(tmp_path))
+    bus.start()
+    try:
+        payload = {"blob": "x" * 4000}
+        started = time.monotonic()
+        for _ in range(2000):
+            bus.publish("noise", payload)
+        assert time.monotonic() - started < 5
+        assert bus.dropped > 0
+        # the peer still gets what fit in its queue
+        assert json.loads(stuck.recv(65536))["channel"] == "noise"
+    finally:
+        bus.stop()
+        stuck.close()
+
+
+@needs_unix
+def test_periodic_job_moves_to_another_worker_when_its_leader_exits():
+    holder = subprocess.Popen(
+        [sys.executable, "-c", "import sys, time; from app.core import leader; "
+                               "print(leader.try_acquire('test-job'), flush=True); time.sleep(60)"],
+        stdout=subprocess.PIPE, text=True, env=os.environ,
+    )
+    runs = threading.Event()
+    worker = PeriodicWorker("test-job", 0.05, runs.set, lock="test-job")
+    try:
+        assert holder.stdout.readline().strip() == "True"
+        worker.start()
+        assert not runs.wait(0.3)
+        holder.kill()
+        holder.wait()
+        assert runs.wait(2)
+    finally:
+        holder.kill()
+        worker.stop()
+    assert "test-job" not in leader._held
+
+
+def test_gps_track_follows_the_device_across_workers():
+    first, second = GpsFilter(max_speed_kmh=180), GpsFilter(max_speed_kmh=180)
+    first.publish = second.apply_remote
+    second.publish = first.apply_remote
+    start = datetime(2025, 1, 1, 8)
+
+    result = first.process("BOX", -19.9, -44.0, start)
+    assert result.status == ACCEPTED
+    first.bind("BOX", result.key, "TEL-1")
+    # the next point goes to the other worker, which only knows the track from the bus
+    assert second.process("BOX", -19.8, -44.0, start + timedelta(seconds=10)).status == OUTLIER
+    assert second.process("BOX", -19.9, -44.0, start).status == DUPLICATE
+    assert second.process("BOX", -19.9, -44.0, start).telemetry_id == "TEL-1"
+    # the outlier seen by the second worker counts on the first one too
+    assert first._tracks["BOX"].rejects == second._tracks["BOX"].rejects
@@ -11,6 +11,7 @@ String BASE_URL = "";
 String DEVICE_ID = "BOX001";
 
 String API_URL_TELEMETRY = BASE_URL + "/telemetry";
+String API_URL_TELEMETRY_FRAMES = BASE_URL + "/telemetry/frames";
 String API_URL_DEVICE = BASE_URL + "/devices/" + DEVICE_ID;
 String API_URL_LOCK = BASE_URL + "/devices/" + DEVICE_ID + "/lock";
 
@@ -24,6 +25,22 @@ HardwareSerial SerialGPS(1);
 
 const int FIXED_BATTERY = 88;
 
+// 1: points are buffered and sent as binary frames (Backend/app/services/wire_service.py)
+#define TELEMETRY_BINARY 1
+#define FRAME_POINTS 12  // one frame per minute at the 5 s loop
+
+struct __attribute__((packed)) TelemetryRecord {
+    uint32_t timestamp;  // unix epoch seconds, 0 = unknown
+    int32_t latitude;    // 1e-7 degrees
+    int32_t longitude;   // 1e-7 degrees
+    uint16_t speed;      // 0.01 km/h
+    uint8_t battery;
+    uint8_t flags;
+};
+
+TelemetryRecord frameRecords[FRAME_POINTS];
+int frameCount = 0;
+
 void connectWifi() {
     Serial.print("Connecting to WiFi ");
     WiFi.begin(WIFI_SSID, WIFI_PASS);
@@ -78,6 +95,60 @@ void sendTelemetry(float lat, float lon, float speed) {
     http.end();
 }
 
+uint32_t getEpoch() {
+    time_t now = time(nullptr);
+    // before the first NTP sync the clock starts at 1970
+    return now > 1577836800 ? (uint32_t)now : 0;
+}
+
+void queueTelemetry(double lat, double lon, float speed) {
+    if (frameCount == FRAME_POINTS) {
+        // the last upload failed: drop the oldest point
+        memmove(frameRecords, frameRecords + 1, sizeof(TelemetryRecord) * (FRAME_POINTS - 1));
+        frameCount--;
+    }
+
+    TelemetryRecord &r = frameRecords[frameCount++];
+    r.timestamp = getEpoch();
+    r.latitude = (int32_t)lround(lat * 1e7);
+    r.longitude = (int32_t)lround(lon * 1e7);
+    r.speed = (uint16_t)min(lround(speed * 100), 0xFFFEL);
+    r.battery = FIXED_BATTERY;
+    r.flags = 0;
+}
+
+void sendTelemetryFrame() {
+    if (frameCount < FRAME_POINTS)
+        return;
+    if (WiFi.status() != WL_CONNECTED)
+        connectWifi();
+
+    uint8_t idLen = DEVICE_ID.length();
+    size_t size = 4 + idLen + 2 + frameCount * sizeof(TelemetryRecord);
+    uint8_t body[size];
+    body[0] = 'G';
+    body[1] = 'T';
+    body[2] = 1;  // version
+    body[3] = idLen;
+    memcpy(body + 4, DEVICE_ID.c_str(), idLen);
+    body[4 + idLen] = frameCount & 0xFF;
+    body[5 + idLen] = frameCount >> 8;
+    memcpy(body + 6 + idLen, frameRecords, frameCount * sizeof(TelemetryRecord));
+
+    HTTPClient http;
+    http.begin(API_URL_TELEMETRY_FRAMES);
+    http.addHeader("Content-Type", "application/vnd.geolockbox.telemetry");
+
+    int code = http.POST(body, size);
+    Serial.println("Telemetry frame HTTP code: " + String(code));
+
+    // kept for the next try unless the server has them
+    if (code == 200)
+        frameCount = 0;
+
+    http.end();
+}
+
 void sendDevicePatch(float lat, float lon) {
     if (WiFi.status() != WL_CONNECTED)
         connectWifi();
@@ -154,7 +225,12 @@ void loop() {
     Serial.printf("GPS: LAT=%.6f LNG=%.6f SPEED=%.2f\n", lat, lon, speed);
 
     if (gps.location.isValid()) {
+#if TELEMETRY_BINARY
+        queueTelemetry(gps.location.lat(), gps.location.lng(), speed);
+        sendTelemetryFrame();
+#else
         sendTelemetry(lat, lon, speed);
+#endif
         sendDevicePatch(lat, lon);
     } else {
         Serial.println("Waiting for GPS fix...");